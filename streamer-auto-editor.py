@@ -1,14 +1,30 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
 import json
 import os
+import sys
+import time
+import argparse
+import multiprocessing
 import subprocess
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+import queue
+import bisect
+import hashlib
+import math
+import tempfile
+import platform
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 
+# Only the GUI needs Tk, so batch, worker and benchmark runs also work on a box without it (or a display)
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+except ImportError:
+    tk = filedialog = messagebox = ttk = None
+
 # build commands to produce an .exe:  
     #  cd /whereever/you/cloned/the/repo
     #  python -m venv venv
@@ -17,6 +33,3073 @@ from pathlib import Path
     #  pyinstaller --onefile --console streamer-auto-editor.py
 
 
+def default_parallel_jobs():
+    # Leave some cores for the encoder threads of each job and the GUI itself
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+def threads_per_job(parallel_jobs):
+    """
+    Splits the CPU budget across concurrent jobs so libx264 doesn't grab every core in each of them.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, parallel_jobs))
+
+
+EXTRACTION_MODES = {
+    "Re-encode": "reencode",
+    "Smart cut (stream copy)": "smartcut",
+    "Single pass (one read)": "batch",
+}
+
+# How the stream and the POV videos share the picture when they are combined
+POV_LAYOUTS = {
+    "Side by side": "side_by_side",
+    "Grid": "grid",
+    "Picture in picture": "pip",
+}
+# Picture in picture insets are this fraction of the stream's height
+PIP_SCALE = 0.25
+
+# Kill-feed overlays: each kill is listed in the chosen corner for kill_feed_seconds, and a name card
+# shows in the opposite corner for the first NAME_CARD_SECONDS of the clip
+KILL_FEED_POSITIONS = {
+    "Top right": "top_right",
+    "Top left": "top_left",
+    "Bottom right": "bottom_right",
+    "Bottom left": "bottom_left",
+}
+# ASS numpad alignments of the feed and of the name card
+KILL_FEED_ALIGNMENT = {"top_right": (9, 1), "top_left": (7, 3), "bottom_right": (3, 7), "bottom_left": (1, 9)}
+NAME_CARD_SECONDS = 3.0
+KILL_FEED_KEYS = (
+    "kill_feed_template", "name_card_template", "kill_feed_position", "kill_feed_seconds", "overlay_font",
+    "overlay_font_size", "overlay_color", "overlay_box_color", "overlay_box_opacity",
+)
+
+# Clips encoded by one single-pass ffmpeg; bounds the number of encoders open at once
+BATCH_CLIPS_PER_PASS = 16
+
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+CLIPS_DIR = "clips"
+
+# The thumbnail strip only builds widgets for clips within STRIP_OVERSCAN slots of the viewport and keeps
+# at most STRIP_IMAGE_CACHE decoded thumbnails/sprites around
+STRIP_SLOT_WIDTH = THUMB_WIDTH + 10
+STRIP_HEIGHT = 150
+STRIP_OVERSCAN = 4
+STRIP_IMAGE_CACHE = 200
+
+# Worker threads post UI events to a queue; the Tk loop applies them in batches every UI_POLL_MS
+UI_POLL_MS = 50
+
+# --check-startup fails when the window takes longer than this to come up, or when one of
+# DEFERRED_MODULES was imported on the way there (they are only needed once something is rendered)
+STARTUP_BUDGET_SECONDS = 2.0
+DEFERRED_MODULES = ("numpy", "PIL", "http.server", "urllib.request")
+UI_EVENTS_PER_TICK = 500
+
+# Extra deliverables written next to the final video, all encoded from one decode of it. Per-clip
+# profiles write one file per selected clip (without the intro/outro) into a <output><suffix> folder.
+OUTPUT_PROFILES = {
+    "reel_720p": {
+        "label": "16:9 reel, 720p",
+        "suffix": "_720p",
+        "filter": "scale=-2:720,setsar=1",
+        "args": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "21", "-c:a", "aac", "-b:a", "160k"],
+        "per_clip": False,
+    },
+    "shorts": {
+        "label": "9:16 shorts, one per clip",
+        "suffix": "_shorts",
+        "filter": "crop=trunc(ih*9/32)*2:ih,scale=1080:1920,setsar=1",
+        "args": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-c:a", "aac", "-b:a", "128k"],
+        "per_clip": True,
+    },
+    "clips": {
+        "label": "16:9 file per clip",
+        "suffix": "_clips",
+        "filter": "",
+        "args": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-c:a", "aac", "-b:a", "192k"],
+        "per_clip": True,
+    },
+}
+
+# Distributed rendering: a worker that misses heartbeats for COORDINATOR_LEASE_SECONDS loses its job, a
+# job is tried COORDINATOR_MAX_ATTEMPTS times, and once the queue is empty a job running longer than
+# STRAGGLER_FACTOR times the median job is handed to an idle worker as well (first result wins).
+COORDINATOR_LEASE_SECONDS = 30
+COORDINATOR_MAX_ATTEMPTS = 3
+STRAGGLER_FACTOR = 2.0
+WORKER_POLL_SECONDS = 1.0
+COORDINATOR_PORT = 8765
+
+# Per-recording probe results are kept in clips/index; bump the version when their contents change
+SOURCE_INDEX_VERSION = 1
+# Smart cuts move a clip's start back onto a keyframe up to this far, so no lead-in has to be encoded
+KEYFRAME_SNAP_SECONDS = 0.5
+
+# Part of every preview cache key; bump when the preview encode settings change
+PREVIEW_ENCODING = "libx264-ultrafast-crf23-aac128k"
+
+PREVIEW_QUALITIES = {
+    "Full quality": "full",
+    "Proxy (fast, final cut from source)": "proxy",
+}
+PROXY_HEIGHT = 360
+PROXY_FPS = 30
+
+# How rendered clips are encoded. Full previews are good enough to be joined into the final video as is;
+# proxies are only for picking clips, so the final video cuts the selection from the recording again
+CLIP_ENCODINGS = {
+    "full": {
+        "tag": PREVIEW_ENCODING,
+        "filter": "",
+        "args": ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "23", "-c:a", "aac", "-b:a", "128k"],
+    },
+    "proxy": {
+        "tag": f"libx264-ultrafast-crf28-{PROXY_HEIGHT}p{PROXY_FPS}-aac96k",
+        "filter": f"scale=-2:'min({PROXY_HEIGHT},ih)',fps={PROXY_FPS}",
+        "args": ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "28", "-c:a", "aac", "-b:a", "96k"],
+    },
+    "final": {
+        "tag": "libx264-veryfast-crf18-aac192k",
+        "filter": "",
+        "args": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-c:a", "aac", "-b:a", "192k"],
+    },
+}
+
+
+def source_identity(path):
+    """
+    Identifies a source file by path, size and modification time, so a re-recorded file at the same
+    path doesn't hit stale cache entries.
+    """
+    try:
+        stat = os.stat(path)
+        return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        return os.path.abspath(path)
+
+
+def clip_key(video_path, start, end, *extra):
+    """
+    Identifies a clip by its source and interval (plus anything else that changes its pixels, e.g. the
+    first person video or the encoding parameters), so cached files survive re-runs that renumber clips.
+    """
+    identity = "|".join([source_identity(video_path), f"{start:.3f}", f"{end:.3f}"] + [str(part) for part in extra])
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:20]
+
+
+def thumbnail_paths(thumb_dir, key, sprite_frames):
+    thumb_path = os.path.join(thumb_dir, f"{key}.png")
+    sprite_path = os.path.join(thumb_dir, f"{key}_sprite{sprite_frames}.png") if sprite_frames else None
+    return thumb_path, sprite_path
+
+
+def preview_image_graph(source_label, suffix, thumb_at, duration, thumb_path, sprite_path, sprite_frames):
+    """
+    Filtergraph branches that turn the decoded frames of a clip into its thumbnail and hover sprite sheet,
+    written at strip size. Pass None for an image that is already cached. Returns (graph, output args).
+    """
+    scale = f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease"
+    graph = []
+    outputs = []
+    labels = [f"thin{suffix}"] if thumb_path else []
+    labels += [f"spin{suffix}"] if sprite_path else []
+    if len(labels) == 2:
+        graph.append(f"[{source_label}]split=2[{labels[0]}][{labels[1]}]")
+    elif labels:
+        labels = [source_label]
+    if thumb_path:
+        graph.append(f"[{labels[0]}]trim=start={thumb_at:.3f},trim=end_frame=1,{scale}[th{suffix}]")
+        outputs += ["-map", f"[th{suffix}]", "-frames:v", "1", "-update", "1", thumb_path]
+    if sprite_path:
+        graph.append(
+            f"[{labels[-1]}]fps={sprite_frames / max(duration, 0.001):.6f},{scale},"
+            f"pad={THUMB_WIDTH}:{THUMB_HEIGHT}:(ow-iw)/2:(oh-ih)/2,tile={sprite_frames}x1[sp{suffix}]"
+        )
+        outputs += ["-map", f"[sp{suffix}]", "-frames:v", "1", "-update", "1", sprite_path]
+    return graph, outputs
+
+
+def run_ffmpeg(cmd, on_progress=None):
+    """
+    Runs an ffmpeg command. With on_progress, ffmpeg's -progress report is read as it encodes and
+    on_progress(seconds) gets the current output position. Returns (ok, stderr).
+    """
+    if on_progress is None:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return proc.returncode == 0, proc.stderr.decode(errors="replace")
+
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + cmd[1:]
+    # stderr goes to a file so a chatty encode can't fill the pipe while we read stdout
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+        for line in proc.stdout:
+            key, _, value = line.decode(errors="replace").strip().partition("=")
+            # out_time_ms is in microseconds too, older builds only write that one
+            if key in ("out_time_us", "out_time_ms") and value.isdigit():
+                on_progress(int(value) / 1e6)
+        proc.wait()
+        stderr_file.seek(0)
+        return proc.returncode == 0, stderr_file.read().decode(errors="replace")
+
+
+def find_tools():
+    """
+    Returns {"ffmpeg": version line or None, "ffprobe": ...}. Each check starts a process, so the app
+    runs this off the Tk thread once the window is up.
+    """
+    tools = {}
+    for tool in ("ffmpeg", "ffprobe"):
+        try:
+            proc = subprocess.run([tool, "-version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            tools[tool] = proc.stdout.decode(errors="replace").split("\n")[0] if proc.returncode == 0 else None
+        except OSError:
+            tools[tool] = None
+    return tools
+
+
+class ProgressTracker:
+    """
+    Combines the progress of concurrent ffmpeg jobs into one fraction and ETA for a stage, weighting
+    each job by its media duration. on_update(stage, fraction, eta_seconds) is called at most every
+    min_interval seconds; with on_update None the tracker does nothing.
+    """
+    def __init__(self, stage, total_seconds, on_update, min_interval=0.25):
+        self.stage = stage
+        self.total = max(total_seconds, 0.001)
+        self.on_update = on_update
+        self.min_interval = min_interval
+        self.done = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_update = 0.0
+
+    def job(self, key, duration, offset=0.0):
+        """
+        Returns an on_progress callable for run_ffmpeg, or None when nobody is listening.
+        """
+        if self.on_update is None:
+            return None
+        return lambda seconds: self.update(key, min(max(seconds - offset, 0.0), duration))
+
+    def finish(self, key, duration):
+        # Cached, stream-copied or failed jobs never report, count them as done
+        if self.on_update is not None:
+            self.update(key, duration, force=True)
+
+    def update(self, key, seconds, force=False):
+        with self.lock:
+            # Multi-output encodes report whichever output is furthest behind, keep the bar from stepping back
+            self.done[key] = max(self.done.get(key, 0.0), seconds)
+            now = time.time()
+            if not force and now - self.last_update < self.min_interval:
+                return
+            self.last_update = now
+            fraction = min(sum(self.done.values()) / self.total, 1.0)
+        elapsed = now - self.started
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        self.on_update(self.stage, fraction, eta)
+
+
+class StageTimer:
+    """
+    Wall time per pipeline stage (log parse, filtering, extraction, ...). Stages timed on several worker
+    threads add up, so their sum can exceed the run's wall time.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                seconds, count = self.stages.get(name, (0.0, 0))
+                self.stages[name] = (seconds + elapsed, count + 1)
+
+    def report(self, log, json_path=None):
+        """
+        Logs one line per stage and optionally writes the same numbers as JSON.
+        """
+        wall = time.time() - self.started
+        log(f"Timings ({wall:.1f}s total):")
+        for name, (seconds, count) in self.stages.items():
+            log(f"  {name}: {seconds:.2f}s" + (f" over {count} jobs" if count > 1 else ""))
+        if json_path:
+            report = {
+                "wall_seconds": round(wall, 3),
+                "stages": {
+                    name: {"seconds": round(seconds, 3), "count": count} for name, (seconds, count) in self.stages.items()
+                },
+            }
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+# Encoders able to produce a lead-in GOP that can be spliced in front of stream-copied packets
+SMART_CUT_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+H264_PROFILES = {"Baseline": "baseline", "Constrained Baseline": "baseline", "Main": "main", "High": "high"}
+
+# Stream parameters that must be identical on both sides of a stream-copy splice
+SPLICE_KEYS = ("codec_type", "codec_name", "profile", "width", "height", "pix_fmt", "sample_rate", "channels")
+
+
+def probe_media(path):
+    """
+    Returns {"start_time": float, "duration": float, "streams": [...]} for a media file using ffprobe,
+    or None on failure.
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=start_time,duration:stream=index,codec_type,codec_name,profile,width,height,"
+        "pix_fmt,r_frame_rate,sample_rate,channels",
+        "-of", "json", path
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        return None
+    info = json.loads(proc.stdout.decode() or "{}")
+    try:
+        start_time = float(info.get("format", {}).get("start_time", 0))
+    except ValueError:
+        start_time = 0.0
+    try:
+        duration = float(info.get("format", {}).get("duration", 0))
+    except ValueError:
+        duration = 0.0
+    return {"start_time": start_time, "duration": duration, "streams": info.get("streams", [])}
+
+
+def splice_params(media):
+    return [tuple(stream.get(key) for key in SPLICE_KEYS) for stream in media["streams"]]
+
+
+def write_concat_list(list_path, paths):
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def find_keyframe_after(path, start, end, start_time=0.0):
+    """
+    Returns the time (relative to the file start) of the first video keyframe in [start, end), or None.
+    Only packet headers are read, nothing is decoded.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-read_intervals", f"{start + start_time}%{end + start_time}",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        return None
+    for line in proc.stdout.decode().splitlines():
+        pts, _, flags = line.partition(",")
+        try:
+            pts = float(pts) - start_time
+        except ValueError:
+            continue
+        if "K" in flags and start <= pts < end:
+            return pts
+    return None
+
+
+def probe_keyframes(path, start_time=0.0):
+    """
+    Returns the sorted times (relative to the file start) of every video keyframe, or None on failure.
+    Reads the packet headers of the whole file once, nothing is decoded.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        return None
+    keyframes = []
+    for line in proc.stdout.decode().splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" not in flags:
+            continue
+        try:
+            keyframes.append(round(float(pts) - start_time, 6))
+        except ValueError:
+            continue
+    return sorted(keyframes)
+
+
+class SourceIndex:
+    """
+    Probe results for the source recordings (duration, stream parameters and, when first needed, the
+    keyframe times), stored as one JSON file per recording under index_dir. An entry is only used while
+    the recording's size and modification time match, so later sessions on the same file skip ffprobe.
+    """
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.entries = {}
+        self.lock = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+
+    def path_for(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.index_dir, f"{name}.json")
+
+    def entry(self, path, keyframes=False):
+        """
+        Returns the index entry for path, probing and saving it if it's missing or stale, or None if the
+        file can't be probed. With keyframes=True the keyframe list is filled in as well.
+        """
+        identity = source_identity(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if not entry or entry["identity"] != identity:
+                entry = self.load(path, identity)
+            if not entry:
+                media = probe_media(path)
+                if not media:
+                    return None
+                entry = {"version": SOURCE_INDEX_VERSION, "identity": identity, "media": media, "keyframes": None}
+                self.save(path, entry)
+            if keyframes and entry["keyframes"] is None:
+                entry["keyframes"] = probe_keyframes(path, entry["media"]["start_time"])
+                if entry["keyframes"] is None:
+                    return None
+                self.save(path, entry)
+            self.entries[path] = entry
+            return entry
+
+    def load(self, path, identity):
+        try:
+            with open(self.path_for(path), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != SOURCE_INDEX_VERSION or entry.get("identity") != identity:
+            return None
+        return entry
+
+    def save(self, path, entry):
+        index_path = self.path_for(path)
+        try:
+            with open(index_path + ".part", "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(index_path + ".part", index_path)
+        except OSError:
+            pass  # The in-memory entry still serves this session
+
+    def media(self, path):
+        entry = self.entry(path)
+        return entry["media"] if entry else None
+
+    def levels(self, path):
+        """
+        The loudness curve of path's audio (see audio_levels), decoded once and saved next to its index
+        entry. Returns None if the file has no readable audio.
+        """
+        import numpy as np
+        entry = self.entry(path)
+        if not entry:
+            return None
+        levels_path = self.path_for(path)[:-len(".json")] + "_levels.npy"
+        if entry.get("levels"):
+            try:
+                return np.load(levels_path)
+            except (OSError, ValueError):
+                pass
+        levels = audio_levels(path)
+        if levels is None:
+            return None
+        try:
+            np.save(levels_path, levels.astype(np.float32))
+        except OSError:
+            return levels
+        with self.lock:
+            entry["levels"] = True
+            self.save(path, entry)
+        return levels
+
+    def keyframe_after(self, path, start, end):
+        # Same contract as find_keyframe_after, answered from the index
+        entry = self.entry(path, keyframes=True)
+        if not entry:
+            return None
+        keyframes = entry["keyframes"]
+        i = bisect.bisect_left(keyframes, start)
+        return keyframes[i] if i < len(keyframes) and keyframes[i] < end else None
+
+    def keyframe_before(self, path, time):
+        entry = self.entry(path, keyframes=True)
+        if not entry:
+            return None
+        keyframes = entry["keyframes"]
+        i = bisect.bisect_right(keyframes, time)
+        return keyframes[i - 1] if i else None
+
+
+def smart_cut_clip(video_path, start, duration, output_path, threads, messages, sources=None):
+    """
+    Cuts [start, start + duration) frame-accurately without re-encoding the whole clip: the lead-in up
+    to the first keyframe is re-encoded with the source's codec parameters and the rest is stream-copied.
+    Returns False when the source can't be spliced, so the caller can fall back to a full re-encode.
+    sources (a SourceIndex) answers the probes without running ffprobe on the recording again.
+    """
+    source = sources.media(video_path) if sources else probe_media(video_path)
+    if not source:
+        messages.append(f"Smart cut: could not probe {video_path}")
+        return False
+    video = next((st for st in source["streams"] if st.get("codec_type") == "video"), None)
+    audio = next((st for st in source["streams"] if st.get("codec_type") == "audio"), None)
+    if not video or video.get("codec_name") not in SMART_CUT_ENCODERS:
+        messages.append("Smart cut: unsupported video codec, re-encoding")
+        return False
+    if audio and audio.get("codec_name") != "aac":
+        messages.append("Smart cut: unsupported audio codec, re-encoding")
+        return False
+
+    end = start + duration
+    if sources:
+        keyframe = sources.keyframe_after(video_path, start, end)
+    else:
+        keyframe = find_keyframe_after(video_path, start, end, source["start_time"])
+    if keyframe is None:
+        messages.append("Smart cut: no keyframe inside the clip, re-encoding")
+        return False
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or ".") as work_dir:
+        parts = []
+        # MPEG-TS keeps the parameter sets in-band, so both halves stay decodable after the join
+        if keyframe - start > 0.001:
+            lead_path = os.path.join(work_dir, "lead.ts")
+            lead_cmd = [
+                "ffmpeg", "-y", "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{keyframe - start:.3f}",
+                "-map", "0:v:0", "-c:v", SMART_CUT_ENCODERS[video["codec_name"]],
+                "-preset", "veryfast", "-crf", "18", "-threads", str(threads),
+                "-pix_fmt", video.get("pix_fmt", "yuv420p")
+            ]
+            if video.get("r_frame_rate") and video["r_frame_rate"] != "0/0":
+                lead_cmd += ["-r", video["r_frame_rate"]]
+            if video["codec_name"] == "h264" and video.get("profile") in H264_PROFILES:
+                lead_cmd += ["-profile:v", H264_PROFILES[video["profile"]]]
+            if audio:
+                lead_cmd += [
+                    "-map", "0:a:0", "-c:a", "aac",
+                    "-ar", str(audio.get("sample_rate", 48000)), "-ac", str(audio.get("channels", 2))
+                ]
+            lead_cmd.append(lead_path)
+            proc = subprocess.run(lead_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if proc.returncode != 0:
+                messages.append("Smart cut: failed to encode lead-in, re-encoding")
+                return False
+            parts.append(lead_path)
+
+        body_path = os.path.join(work_dir, "body.ts")
+        body_cmd = [
+            "ffmpeg", "-y", "-ss", f"{keyframe:.3f}", "-i", video_path, "-t", f"{end - keyframe:.3f}",
+            "-map", "0:v:0", "-c", "copy"
+        ]
+        if audio:
+            body_cmd += ["-map", "0:a:0"]
+        body_cmd.append(body_path)
+        proc = subprocess.run(body_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            messages.append("Smart cut: failed to copy clip body, re-encoding")
+            return False
+        parts.append(body_path)
+
+        # Fall back when the encoder couldn't reproduce the source parameters (profile, pix_fmt, ...)
+        probed = [probe_media(part) for part in parts]
+        if not all(probed) or any(splice_params(m) != splice_params(probed[-1]) for m in probed):
+            messages.append("Smart cut: codec parameters differ across the splice, re-encoding")
+            return False
+
+        list_path = os.path.join(work_dir, "parts.txt")
+        write_concat_list(list_path, parts)
+        concat_cmd = [
+            "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-movflags", "+faststart", output_path
+        ]
+        proc = subprocess.run(concat_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            messages.append("Smart cut: failed to join lead-in and body, re-encoding")
+            return False
+    return True
+
+
+def concat_params(media):
+    # Besides the splice parameters, concatenated inputs also need matching frame rates
+    return [
+        tuple(stream.get(key) for key in SPLICE_KEYS + ("r_frame_rate",))
+        for stream in media["streams"] if stream.get("codec_type") in ("video", "audio")
+    ]
+
+
+def normalize_media(input_path, output_path, video, audio, threads, on_progress=None):
+    """
+    Re-encodes an input (e.g. an intro at a different resolution) to the reference video/audio parameters
+    so it can be joined with the other inputs by stream copy. Returns (ok, stderr).
+    """
+    width, height = video["width"], video["height"]
+    vf = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={video.get('r_frame_rate', '30/1')},format={video.get('pix_fmt', 'yuv420p')}"
+    )
+    cmd = ["ffmpeg", "-y", "-i", input_path]
+    sample_rate = str(audio.get("sample_rate", 48000)) if audio else "48000"
+    channels = int(audio.get("channels", 2)) if audio else 2
+    source = probe_media(input_path)
+    has_audio = source and any(st.get("codec_type") == "audio" for st in source["streams"])
+    if not has_audio:
+        # The concat demuxer needs every input to carry the same streams, so add silence
+        layout = "mono" if channels == 1 else "stereo"
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={sample_rate}:cl={layout}", "-shortest"]
+    cmd += [
+        "-map", "0:v:0", "-map", "0:a:0" if has_audio else "1:a:0",
+        "-vf", vf, "-c:v", SMART_CUT_ENCODERS.get(video.get("codec_name"), "libx264"),
+        "-preset", "ultrafast", "-crf", "23", "-threads", str(threads)
+    ]
+    if video.get("codec_name") == "h264" and video.get("profile") in H264_PROFILES:
+        cmd += ["-profile:v", H264_PROFILES[video["profile"]]]
+    cmd += ["-c:a", "aac", "-ar", sample_rate, "-ac", str(channels), output_path]
+    return run_ffmpeg(cmd, on_progress)
+
+
+def concat_media(input_paths, output_path, work_dir, parallel_jobs, log, on_progress=None, timer=None):
+    """
+    Joins the inputs with ffmpeg's concat demuxer. Inputs that share the most common codec parameters are
+    stream-copied; only the ones that differ are normalized first. The demuxer opens one input at a time
+    and normalization runs on at most parallel_jobs inputs, so memory stays flat with the clip count.
+    on_progress(stage, fraction, eta) follows both steps; timer records them as "encode" and "concat".
+    """
+    timer = timer or StageTimer()
+    probes = []
+    for path in input_paths:
+        media = probe_media(path)
+        if not media:
+            log(f"Skipping unreadable input: {path}")
+            continue
+        probes.append((path, media))
+    if not probes:
+        return False
+
+    # The most common parameter set wins, usually the preview clips themselves
+    counts = {}
+    for path, media in probes:
+        key = repr(concat_params(media))
+        counts[key] = counts.get(key, 0) + 1
+    most_common = max(counts, key=counts.get)
+    reference = next(media for path, media in probes if repr(concat_params(media)) == most_common)
+    video = next((st for st in reference["streams"] if st.get("codec_type") == "video"), None)
+    audio = next((st for st in reference["streams"] if st.get("codec_type") == "audio"), None)
+    if not video:
+        log("No video stream found in the final inputs.")
+        return False
+
+    parts = [path for path, media in probes]
+    to_normalize = [
+        i for i, (path, media) in enumerate(probes)
+        if concat_params(media) != concat_params(reference) or video.get("codec_name") not in SMART_CUT_ENCODERS
+    ]
+    if to_normalize:
+        log(f"Normalizing {len(to_normalize)} of {len(parts)} inputs to {video['width']}x{video['height']}...")
+        threads = threads_per_job(parallel_jobs)
+        tracker = ProgressTracker("Normalizing", sum(probes[i][1]["duration"] for i in to_normalize), on_progress)
+        with timer.stage("encode"), ThreadPoolExecutor(max_workers=parallel_jobs) as pool:
+            futures = {
+                pool.submit(
+                    normalize_media, parts[i], os.path.join(work_dir, f"normalized_{i}.mp4"), video, audio, threads,
+                    tracker.job(i, probes[i][1]["duration"])
+                ): i for i in to_normalize
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                ok, stderr = future.result()
+                if not ok:
+                    log(f"Failed to normalize {parts[i]}")
+                    log(stderr)
+                    return False
+                tracker.finish(i, probes[i][1]["duration"])
+                parts[i] = os.path.join(work_dir, f"normalized_{i}.mp4")
+
+    list_path = os.path.join(work_dir, "concat.txt")
+    write_concat_list(list_path, parts)
+
+    log(f"Joining {len(parts)} inputs without re-encoding...")
+    cmd = [
+        "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+        "-map", "0:v:0", "-map", "0:a?", "-c", "copy", "-movflags", "+faststart", output_path
+    ]
+    total = sum(media["duration"] for path, media in probes)
+    tracker = ProgressTracker("Joining", total, on_progress)
+    with timer.stage("concat"):
+        ok, stderr = run_ffmpeg(cmd, tracker.job("join", total))
+    if not ok:
+        log("Stream-copy join failed:")
+        log(stderr)
+        return False
+    return True
+
+
+def export_profiles(video_path, profiles, output_base, boundaries, threads, first_clip=0, clip_count=None,
+                    has_audio=True, on_progress=None):
+    """
+    Writes every OUTPUT_PROFILES entry in profiles from a single decode of video_path: the frames go
+    through split/asplit into one scale/crop chain and encoder per profile. Per-clip profiles cut the
+    video at boundaries (the end times of each input of the joined video) with the segment muxer and keep
+    clip_count files from first_clip on. Returns (ok, stderr).
+    """
+    count = len(profiles)
+    graph = [f"[0:v]split={count}" + "".join(f"[v{k}]" for k in range(count))]
+    if has_audio:
+        graph.append(f"[0:a]asplit={count}" + "".join(f"[a{k}]" for k in range(count)))
+    cuts = ",".join(f"{t:.3f}" for t in boundaries[:-1])
+
+    cmd = ["ffmpeg", "-y", "-i", video_path]
+    folders = []
+    outputs = []
+    for k, name in enumerate(profiles):
+        profile = OUTPUT_PROFILES[name]
+        graph.append(f"[v{k}]{profile['filter'] or 'null'}[out{k}]")
+        outputs += ["-map", f"[out{k}]"] + (["-map", f"[a{k}]"] if has_audio else [])
+        outputs += profile["args"] + ["-threads", str(threads)]
+        if profile["per_clip"]:
+            folder = output_base + profile["suffix"]
+            os.makedirs(folder, exist_ok=True)
+            folders.append(folder)
+            if cuts:
+                # Keyframes at the cut points let the segment muxer split exactly on the clip boundaries; the delta
+                # absorbs the rounding between the requested times and the forced keyframes
+                outputs += [
+                    "-force_key_frames", cuts, "-f", "segment", "-segment_times", cuts, "-segment_time_delta", "0.05",
+                    "-reset_timestamps", "1",
+                    "-segment_format_options", "movflags=+faststart", os.path.join(folder, "part_%03d.mp4")
+                ]
+            else:
+                # A single input has nothing to cut, it is the only part
+                outputs += ["-movflags", "+faststart", os.path.join(folder, "part_000.mp4")]
+        else:
+            outputs += ["-movflags", "+faststart", output_base + profile["suffix"] + ".mp4"]
+    cmd += ["-filter_complex", ";".join(graph)] + outputs
+    ok, stderr = run_ffmpeg(cmd, on_progress)
+
+    # Name the clip files after their place in the reel and drop the intro/outro parts
+    for folder in folders:
+        for part, name in enumerate(sorted(n for n in os.listdir(folder) if n.startswith("part_"))):
+            path = os.path.join(folder, name)
+            clip = part - first_clip
+            if ok and 0 <= clip < (clip_count if clip_count is not None else len(boundaries)):
+                os.replace(path, os.path.join(folder, f"clip_{clip + 1:03d}.mp4"))
+            else:
+                os.remove(path)
+    return ok, stderr
+
+
+def extract_clip(video_path, start, duration, output_path, threads, thumb_path=None, sprite_path=None,
+                 sprite_frames=0, quality="full", on_progress=None, overlay=None):
+    """
+    Re-encodes one interval of the recording. Thumbnail and sprite are extra outputs of the same decode.
+    overlay is a filter burned into the clip (not the images), e.g. the kill feed. Returns (ok, stderr).
+    """
+    graph, image_outputs = preview_image_graph(
+        "iv", 0, min(1.0, duration / 2), duration, thumb_path, sprite_path, sprite_frames
+    )
+    video_filter = ",".join(f for f in (overlay, CLIP_ENCODINGS[quality]["filter"]) if f)
+    if image_outputs:
+        graph.insert(0, "[0:v]split=2[cv][iv]")
+        video_label = "[cv]"
+    else:
+        video_label = "0:v:0"
+    if video_filter:
+        graph.append(f"[{video_label.strip('[]')}]{video_filter}[pv]")
+        video_label = "[pv]"
+
+    cmd = ["ffmpeg", "-y", "-ss", format_timestamp(start), "-t", str(duration), "-i", video_path]
+    if graph:
+        cmd += ["-filter_complex", ";".join(graph)]
+    cmd += ["-map", video_label, "-map", "0:a:0?"] + CLIP_ENCODINGS[quality]["args"]
+    cmd += ["-threads", str(threads), output_path] + image_outputs
+    return run_ffmpeg(cmd, on_progress)
+
+
+def pov_list(value):
+    # POV paths and first kill times are given as one value or as a list with one entry per POV
+    if not value:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def video_size(media):
+    video = next((st for st in media["streams"] if st.get("codec_type") == "video" and st.get("height")), None)
+    return (video["width"], video["height"]) if video else (1280, 720)
+
+
+def pov_layout_graph(labels, medias, layout, out_label):
+    """
+    Filtergraph that composes the video labels (the stream first, then one per POV) into a single yuv420p
+    picture labelled out_label. "side_by_side" puts them in a row at the smallest source height, "grid"
+    tiles them into 16:9 cells that together are as tall as the smallest source, and "pip" keeps the
+    stream full size with the POVs inset along its bottom edge.
+    """
+    count = len(labels)
+    sizes = [video_size(media) for media in medias]
+    height = min(h for w, h in sizes) // 2 * 2
+    graph = []
+    if layout == "grid":
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        cell_height = height // rows // 2 * 2
+        cell_width = cell_height * 16 // 9 // 2 * 2
+        for k, label in enumerate(labels):
+            graph.append(
+                f"[{label}]scale={cell_width}:{cell_height}:force_original_aspect_ratio=decrease,"
+                f"pad={cell_width}:{cell_height}:(ow-iw)/2:(oh-ih)/2,setsar=1[cell{k}]"
+            )
+        positions = "|".join(f"{(k % columns) * cell_width}_{(k // columns) * cell_height}" for k in range(count))
+        graph.append(
+            "".join(f"[cell{k}]" for k in range(count))
+            + f"xstack=inputs={count}:layout={positions}:fill=black,format=yuv420p[{out_label}]"
+        )
+    elif layout == "pip":
+        width, height = sizes[0][0] // 2 * 2, sizes[0][1] // 2 * 2
+        inset_height = int(height * PIP_SCALE) // 2 * 2
+        inset_width = inset_height * 16 // 9 // 2 * 2
+        margin = max(height // 40, 2)
+        per_row = max(1, (width - margin) // (inset_width + margin))
+        graph.append(f"[{labels[0]}]scale={width}:{height},setsar=1[pip0]")
+        for k, label in enumerate(labels[1:], start=1):
+            graph.append(
+                f"[{label}]scale={inset_width}:{inset_height}:force_original_aspect_ratio=decrease,"
+                f"pad={inset_width}:{inset_height}:(ow-iw)/2:(oh-ih)/2,setsar=1[inset{k}]"
+            )
+            # Right to left along the bottom, wrapping upwards when a row is full
+            x = width - (((k - 1) % per_row) + 1) * (inset_width + margin)
+            y = height - (((k - 1) // per_row) + 1) * (inset_height + margin)
+            target = out_label if k == count - 1 else f"pip{k}"
+            tail = ",format=yuv420p" if k == count - 1 else ""
+            graph.append(f"[pip{k - 1}][inset{k}]overlay=x={x}:y={y}{tail}[{target}]")
+    else:
+        # hstack needs equal heights and yuv420p needs even dimensions
+        for k, label in enumerate(labels):
+            graph.append(f"[{label}]scale=-2:{height},setsar=1[row{k}]")
+        graph.append("".join(f"[row{k}]" for k in range(count)) + f"hstack=inputs={count},format=yuv420p[{out_label}]")
+    return graph
+
+
+def pov_layout_size(medias, layout):
+    """
+    (width, height) of the picture pov_layout_graph builds from these sources, to within the rounding of
+    its scale filters.
+    """
+    sizes = [video_size(media) for media in medias]
+    height = min(h for w, h in sizes) // 2 * 2
+    if layout == "grid":
+        columns = math.ceil(math.sqrt(len(sizes)))
+        rows = math.ceil(len(sizes) / columns)
+        cell_height = height // rows // 2 * 2
+        return columns * (cell_height * 16 // 9 // 2 * 2), rows * cell_height
+    if layout == "pip":
+        return sizes[0][0] // 2 * 2, sizes[0][1] // 2 * 2
+    return sum(round(w * height / h / 2) * 2 for w, h in sizes), height
+
+
+def composite_inputs(sources, span_start, span_duration):
+    """
+    Input args for the sources of a composite, each seeked to span_start plus its own offset. A source
+    that starts later than that gets black frames and silence in front instead. Returns (args, pads).
+    """
+    args = []
+    pads = []
+    for path, media, offset in sources:
+        start = span_start + offset
+        pads.append(max(-start, 0.0))
+        args += ["-ss", format_timestamp(max(start, 0.0)), "-t", f"{span_duration - pads[-1]:.3f}", "-i", path]
+    return args, pads
+
+
+def lead_in_filters(pad):
+    if pad <= 0:
+        return "", ""
+    return f"tpad=start_duration={pad:.3f}:color=black,", f"adelay={int(pad * 1000)}:all=1,"
+
+
+def composite_clip(sources, layout, duration, output_path, threads, thumb_path=None, sprite_path=None, sprite_frames=0,
+                   quality="full", on_progress=None, overlay=None):
+    """
+    Renders the stream and any number of POV videos in one picture (see pov_layout_graph), with every
+    audio track mixed, in a single ffmpeg filtergraph. sources is a list of (path, media, start), the
+    stream first. Thumbnail and sprite come out of the same decode; overlay is burned into the clip only.
+    Returns (ok, stderr).
+    """
+    input_args, pads = composite_inputs(sources, 0.0, duration)
+    graph = []
+    labels = []
+    for i, pad in enumerate(pads):
+        video_pad, audio_pad = lead_in_filters(pad)
+        graph.append(f"[{i}:v]{video_pad}null[src{i}]")
+        labels.append(f"src{i}")
+    graph += pov_layout_graph(labels, [media for path, media, start in sources], layout, "stack")
+    image_graph, image_outputs = preview_image_graph(
+        "iv", 0, min(1.0, duration / 2), duration, thumb_path, sprite_path, sprite_frames
+    )
+    video_label = "[stack]"
+    if image_outputs:
+        graph.append("[stack]split=2[composite][iv]")
+        graph += image_graph
+        video_label = "[composite]"
+    encoding = CLIP_ENCODINGS[quality]
+    video_filter = ",".join(f for f in (overlay, encoding["filter"]) if f)
+    if video_filter:
+        graph.append(f"{video_label}{video_filter}[out]")
+        video_label = "[out]"
+
+    audio_inputs = []
+    for i, (path, media, start) in enumerate(sources):
+        if any(st.get("codec_type") == "audio" for st in media["streams"]):
+            video_pad, audio_pad = lead_in_filters(pads[i])
+            graph.append(f"[{i}:a:0]{audio_pad}anull[sa{i}]")
+            audio_inputs.append(f"[sa{i}]")
+    audio_map = []
+    if len(audio_inputs) > 1:
+        # Summed like the old CompositeAudioClip, not averaged
+        graph.append(f"{''.join(audio_inputs)}amix=inputs={len(audio_inputs)}:duration=longest:normalize=0[mix]")
+        audio_map = ["-map", "[mix]"]
+    elif audio_inputs:
+        audio_map = ["-map", audio_inputs[0]]
+
+    cmd = (
+        ["ffmpeg", "-y"] + input_args + ["-filter_complex", ";".join(graph), "-map", video_label]
+        + audio_map + encoding["args"] + ["-threads", str(threads), "-t", f"{duration:.3f}", output_path] + image_outputs
+    )
+    return run_ffmpeg(cmd, on_progress)
+
+
+def composite_clips_single_pass(sources, layout, jobs, threads, sprite_frames, quality="full", on_progress=None,
+                                overlays=None):
+    """
+    Like extract_clips_single_pass, for composites: every source is read once, front to back, over the
+    span of the jobs and split into one branch per clip. sources is a list of (path, media, offset) where
+    offset is added to a stream time to get the same moment in that source (0 for the stream itself).
+    Returns (ok, stderr).
+    """
+    encoding = CLIP_ENCODINGS[quality]
+    overlays = overlays or [None] * len(jobs)
+    span_start = jobs[0][0]
+    span_end = max(job[1] for job in jobs)
+    count = len(jobs)
+    input_args, pads = composite_inputs(sources, span_start, span_end - span_start)
+    medias = [media for path, media, offset in sources]
+    with_audio = [i for i, media in enumerate(medias) if any(st.get("codec_type") == "audio" for st in media["streams"])]
+
+    graph = []
+    for i, pad in enumerate(pads):
+        video_pad, audio_pad = lead_in_filters(pad)
+        graph.append(f"[{i}:v]{video_pad}split={count}" + "".join(f"[v{i}_{k}]" for k in range(count)))
+        if i in with_audio:
+            graph.append(f"[{i}:a:0]{audio_pad}asplit={count}" + "".join(f"[a{i}_{k}]" for k in range(count)))
+    image_outputs = []
+    for k, (start, end, clip_path, thumb_path, sprite_path) in enumerate(jobs):
+        clip_start = start - span_start
+        clip_end = end - span_start
+        trim = f"trim=start={clip_start:.3f}:end={clip_end:.3f},setpts=PTS-STARTPTS"
+        for i in range(len(sources)):
+            graph.append(f"[v{i}_{k}]{trim}[t{i}_{k}]")
+        graph += pov_layout_graph([f"t{i}_{k}" for i in range(len(sources))], medias, layout, f"stack{k}")
+        video_filter = "".join(f",{f}" for f in (overlays[k], encoding["filter"]) if f)
+        if thumb_path or sprite_path:
+            graph.append(f"[stack{k}]split=2[tv{k}][sv{k}]")
+            graph.append(f"[tv{k}]null{video_filter}[cv{k}]")
+            images, outputs = preview_image_graph(
+                f"sv{k}", k, min(1.0, (clip_end - clip_start) / 2), clip_end - clip_start,
+                thumb_path, sprite_path, sprite_frames
+            )
+            graph += images
+            image_outputs.append(outputs)
+        else:
+            graph.append(f"[stack{k}]null{video_filter}[cv{k}]")
+            image_outputs.append([])
+        atrim = f"atrim=start={clip_start:.3f}:end={clip_end:.3f},asetpts=PTS-STARTPTS"
+        for i in with_audio:
+            graph.append(f"[a{i}_{k}]{atrim}[ta{i}_{k}]")
+        if len(with_audio) > 1:
+            graph.append(
+                "".join(f"[ta{i}_{k}]" for i in with_audio)
+                + f"amix=inputs={len(with_audio)}:duration=longest:normalize=0[ca{k}]"
+            )
+        elif with_audio:
+            graph.append(f"[ta{with_audio[0]}_{k}]anull[ca{k}]")
+
+    cmd = ["ffmpeg", "-y"] + input_args + ["-filter_complex", ";".join(graph)]
+    for k, (start, end, clip_path, thumb_path, sprite_path) in enumerate(jobs):
+        cmd += ["-map", f"[cv{k}]"]
+        if with_audio:
+            cmd += ["-map", f"[ca{k}]"]
+        cmd += encoding["args"] + ["-threads", str(threads), clip_path]
+        cmd += image_outputs[k]
+    return run_ffmpeg(cmd, on_progress)
+
+
+def extract_clips_single_pass(video_path, jobs, threads, has_audio, sprite_frames, quality="full", on_progress=None,
+                              overlays=None):
+    """
+    Extracts several clips and their thumbnails with one ffmpeg that reads the recording once, front to
+    back. jobs is a list of (start, end, clip_path, thumb_path, sprite_path) sorted by start, with None
+    for images that are already cached, and overlays an optional filter to burn into each clip.
+    Returns (ok, stderr).
+    """
+    encoding = CLIP_ENCODINGS[quality]
+    overlays = overlays or [None] * len(jobs)
+    span_start = jobs[0][0]
+    span_end = max(job[1] for job in jobs)
+    count = len(jobs)
+
+    graph = [f"[0:v]split={count}" + "".join(f"[v{k}]" for k in range(count))]
+    if has_audio:
+        graph.append(f"[0:a]asplit={count}" + "".join(f"[a{k}]" for k in range(count)))
+    image_outputs = []
+    for k, (start, end, clip_path, thumb_path, sprite_path) in enumerate(jobs):
+        # Input seeking resets timestamps to the start of the span
+        clip_start = start - span_start
+        clip_end = end - span_start
+        video_filter = "".join(f",{f}" for f in (overlays[k], encoding["filter"]) if f)
+        trim = f"[v{k}]trim=start={clip_start:.3f}:end={clip_end:.3f}"
+        if thumb_path or sprite_path:
+            graph.append(f"{trim},split=2[tv{k}][sv{k}]")
+            graph.append(f"[tv{k}]setpts=PTS-STARTPTS{video_filter}[cv{k}]")
+            images, outputs = preview_image_graph(
+                f"sv{k}", k, clip_start + min(1.0, (clip_end - clip_start) / 2), clip_end - clip_start,
+                thumb_path, sprite_path, sprite_frames
+            )
+            graph += images
+            image_outputs.append(outputs)
+        else:
+            graph.append(f"{trim},setpts=PTS-STARTPTS{video_filter}[cv{k}]")
+            image_outputs.append([])
+        if has_audio:
+            graph.append(f"[a{k}]atrim=start={clip_start:.3f}:end={clip_end:.3f},asetpts=PTS-STARTPTS[ca{k}]")
+
+    cmd = [
+        "ffmpeg", "-y", "-ss", f"{span_start:.3f}", "-t", f"{span_end - span_start:.3f}", "-i", video_path,
+        "-filter_complex", ";".join(graph)
+    ]
+    for k, (start, end, clip_path, thumb_path, sprite_path) in enumerate(jobs):
+        cmd += ["-map", f"[cv{k}]"]
+        if has_audio:
+            cmd += ["-map", f"[ca{k}]"]
+        cmd += encoding["args"] + ["-threads", str(threads), clip_path]
+        cmd += image_outputs[k]
+    return run_ffmpeg(cmd, on_progress)
+
+
+def filter_path(path):
+    """
+    Escapes a file path for a filter option inside -filter_complex: once for the option parser and
+    once more for the graph parser. Forward slashes work on Windows too.
+    """
+    path = path.replace("\\", "/")
+    for specials in ("\\':=", "\\'[],;"):
+        path = "".join("\\" + c if c in specials else c for c in path)
+    return path
+
+
+def ass_color(color, opacity=1.0):
+    # "#RRGGBB" to ASS's &HAABBGGRR, where alpha 00 is opaque
+    rgb = color.lstrip("#")
+    if len(rgb) != 6:
+        raise ValueError(f"{color!r} is not a #RRGGBB color")
+    red, green, blue = int(rgb[0:2], 16), int(rgb[2:4], 16), int(rgb[4:6], 16)
+    alpha = round(255 * (1 - min(max(opacity, 0.0), 1.0)))
+    return f"&H{alpha:02X}{blue:02X}{green:02X}{red:02X}"
+
+
+def ass_text(text):
+    # Braces would open an override block and a backslash an escape sequence
+    return text.replace("\\", "\\\u2060").replace("{", "(").replace("}", ")")
+
+
+def ass_time(seconds):
+    centis = int(round(max(seconds, 0.0) * 100))
+    return f"{centis // 360000}:{centis // 6000 % 60:02d}:{centis // 100 % 60:02d}.{centis % 100:02d}"
+
+
+def kill_feed_style(settings):
+    """
+    Picks the overlay settings out of settings, or returns None when the kill feed is off. Raises
+    ValueError with a user-facing message for a template or color that can't be used.
+    """
+    if not settings.get("kill_feed"):
+        return None
+    style = {key: settings.get(key, DEFAULT_SETTINGS[key]) for key in KILL_FEED_KEYS}
+    samples = (
+        ("kill_feed_template", {"killer": "", "victim": ""}),
+        ("name_card_template", {"killers": "", "victims": "", "kills": 0}),
+    )
+    for key, fields in samples:
+        try:
+            style[key].format(**fields)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid {key.replace('_', ' ')} {style[key]!r}: {e}")
+    try:
+        ass_color(style["overlay_color"])
+        ass_color(style["overlay_box_color"])
+    except ValueError as e:
+        raise ValueError(f"Invalid overlay color: {e}")
+    if style["kill_feed_position"] not in KILL_FEED_ALIGNMENT:
+        raise ValueError(f"Invalid kill feed position {style['kill_feed_position']!r}.")
+    return style
+
+
+def kill_feed_script(clip, size, style):
+    """
+    ASS subtitle script with the clip's kill feed and name card, timed from the start of the clip, for a
+    picture of size (width, height). Kills are placed by the clip's kill_times. Returns None when there
+    is nothing to show.
+    """
+    width, height = size
+    duration = clip["end"] - clip["start"]
+    feed_seconds = float(style["kill_feed_seconds"])
+    events = []
+    for killer, victim, at in zip(clip["killers"], clip["killed_list"], clip.get("kill_times", [])):
+        start = max(at - clip["start"], 0.0)
+        text = style["kill_feed_template"].format(killer=killer, victim=victim)
+        if text and start < duration:
+            events.append(("Feed", start, min(start + feed_seconds, duration), text))
+    card = style["name_card_template"].format(
+        killers=", ".join(dict.fromkeys(clip["killers"])), victims=", ".join(dict.fromkeys(clip["killed_list"])),
+        kills=len(clip["killers"])
+    )
+    if card:
+        events.append(("Card", 0.0, min(NAME_CARD_SECONDS, duration), card))
+    if not events:
+        return None
+
+    feed_alignment, card_alignment = KILL_FEED_ALIGNMENT[style["kill_feed_position"]]
+    font_size = max(1, round(height * float(style["overlay_font_size"]) / 100))
+    margin = max(2, height // 40)
+    text_color = ass_color(style["overlay_color"])
+    box_color = ass_color(style["overlay_box_color"], float(style["overlay_box_opacity"]))
+    # BorderStyle 3 draws an opaque box, Outline is its padding
+    styles = [
+        f"Style: {name},{style['overlay_font']},{size},{text_color},{text_color},{box_color},{box_color},"
+        f"-1,0,0,0,100,100,0,0,3,{max(1, size // 5)},0,{alignment},{margin},{margin},{margin},1"
+        for name, size, alignment in (
+            ("Feed", font_size, feed_alignment), ("Card", round(font_size * 1.25), card_alignment)
+        )
+    ]
+    lines = [
+        "[Script Info]", "ScriptType: v4.00+", f"PlayResX: {width}", f"PlayResY: {height}", "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes", "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, "
+        "MarginR, MarginV, Encoding",
+    ] + styles + [
+        "", "[Events]", "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for name, start, end, text in events:
+        lines.append(f"Dialogue: 0,{ass_time(start)},{ass_time(end)},{name},,0,0,0,,{ass_text(text)}")
+    return "\n".join(lines) + "\n"
+
+
+# Audio sync: recordings are decoded to 8 kHz mono and reduced to an onset envelope with one value per
+# 10 ms, which is what gets cross-correlated. Caster and headset audio are mixed differently, but the
+# shots and callouts start at the same moments in both.
+SYNC_DECODE_RATE = 8000
+SYNC_ENVELOPE_RATE = 100
+# Length of the first person excerpt matched against the stream, and how far around a rough hint to search
+SYNC_PROBE_SECONDS = 300
+SYNC_SEARCH_SECONDS = 600
+
+# Audio energy analysis reuses the sync loudness curve. Frames louder than ENERGY_ACTIVE_PERCENTILE of the
+# recording count as action, with dips up to ENERGY_GAP_SECONDS bridged; trimmed clips keep at least
+# ENERGY_MIN_PADDING before the first and after the last kill.
+ENERGY_ACTIVE_PERCENTILE = 75
+ENERGY_GAP_SECONDS = 0.5
+ENERGY_MIN_PADDING = 1.0
+
+
+def audio_levels(path, start=0.0, duration=None):
+    """
+    Decodes the audio of path (from start, for duration seconds) in streaming chunks and returns its log
+    loudness (log1p of the RMS) per SYNC_ENVELOPE_RATE frame. Returns None if there is no audio.
+    """
+    import numpy as np
+    hop = SYNC_DECODE_RATE // SYNC_ENVELOPE_RATE
+    cmd = ["ffmpeg", "-v", "error", "-ss", format_timestamp(start)]
+    if duration:
+        cmd += ["-t", str(duration)]
+    cmd += ["-i", path, "-vn", "-ac", "1", "-ar", str(SYNC_DECODE_RATE), "-f", "s16le", "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    # Only the per-frame loudness is kept, never the decoded samples of the whole recording
+    levels = []
+    leftover = b""
+    frame_bytes = hop * 2
+    while True:
+        data = proc.stdout.read(frame_bytes * 4096)
+        if not data:
+            break
+        data = leftover + data
+        usable = len(data) // frame_bytes * frame_bytes
+        leftover = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32).reshape(-1, hop)
+        levels.append(np.sqrt(np.mean(samples * samples, axis=1)))
+    proc.wait()
+    if not levels:
+        return None
+    return np.log1p(np.concatenate(levels))
+
+
+def audio_onset_envelope(path, start=0.0, duration=None):
+    """
+    The rise in log loudness per SYNC_ENVELOPE_RATE frame of path's audio. Returns None if there is no audio.
+    """
+    import numpy as np
+    level = audio_levels(path, start, duration)
+    if level is None:
+        return None
+    return np.maximum(np.diff(level, prepend=level[0]), 0.0)
+
+
+def score_and_trim_clips(merged_clips, event_times, levels, trim=True):
+    """
+    Scores every merged clip by how loud its action is compared to the rest of the recording (the mean of
+    its loudest second above the median level) and, with trim, pulls the before/after padding in to where
+    the audio around the kills is active. The kills themselves plus ENERGY_MIN_PADDING on each side are
+    always kept. event_times holds the (first, last) kill time of each clip. Returns new clip dicts with
+    a "score".
+    """
+    import numpy as np
+    rate = SYNC_ENVELOPE_RATE
+    median = float(np.median(levels))
+    # Frames above the threshold count as action; short dips are bridged so one fight stays one run
+    active = levels > np.percentile(levels, ENERGY_ACTIVE_PERCENTILE)
+    bridge = int(ENERGY_GAP_SECONDS * rate)
+    if bridge > 1:
+        active = np.convolve(active, np.ones(bridge), mode="same") > 0
+
+    def frame(t):
+        return int(np.clip(round(t * rate), 0, len(levels)))
+
+    scored = []
+    for clip, (first_kill, last_kill) in zip(merged_clips, event_times):
+        start, end = clip["start"], clip["end"]
+        if trim:
+            lead = min(max(first_kill - ENERGY_MIN_PADDING, start), end)
+            tail = max(min(last_kill + ENERGY_MIN_PADDING, end), lead)
+            # Walk outwards from the kills while the audio stays active
+            before = active[frame(start):frame(lead)][::-1]
+            quiet = np.flatnonzero(~before)
+            start = lead - (quiet[0] if quiet.size else before.size) / rate
+            after = active[frame(tail):frame(end)]
+            quiet = np.flatnonzero(~after)
+            end = tail + (quiet[0] if quiet.size else after.size) / rate
+        excess = np.maximum(levels[frame(start):frame(end)] - median, 0.0)
+        loudest = min(rate, excess.size)
+        score = float(np.partition(excess, -loudest)[-loudest:].mean()) if loudest else 0.0
+        scored.append(dict(clip, start=start, end=end, score=score))
+    return scored
+
+
+def select_top_clips(clips, top_n=0, target_seconds=0):
+    """
+    Keeps the best scored clips, at most top_n of them (0 for no limit) and, with target_seconds, only as
+    many as fit in that reel length. The result is back in chronological order.
+    """
+    ranked = sorted(range(len(clips)), key=lambda i: clips[i]["score"], reverse=True)
+    if top_n:
+        ranked = ranked[:top_n]
+    if target_seconds:
+        kept = []
+        total = 0.0
+        for i in ranked:
+            duration = clips[i]["end"] - clips[i]["start"]
+            if kept and total + duration > target_seconds:
+                continue
+            kept.append(i)
+            total += duration
+        ranked = kept
+    return [clips[i] for i in sorted(ranked)]
+
+
+def locate_template(signal, template):
+    """
+    Normalized cross-correlation of template against every position of signal, computed with FFTs.
+    Returns (position in frames, refined to a fraction of a frame, score from -1 to 1), or (None, 0.0)
+    when either input is unusable.
+    """
+    import numpy as np
+    n, m = len(signal), len(template)
+    template = template - template.mean()
+    template_norm = np.sqrt(np.sum(template * template))
+    if m < 2 or n < m or template_norm == 0:
+        return None, 0.0
+
+    size = 1 << int(np.ceil(np.log2(n + m)))
+    corr = np.fft.irfft(np.fft.rfft(signal, size) * np.conj(np.fft.rfft(template, size)), size)[:n - m + 1]
+    # Energy of the signal under the template at each position, from running sums
+    sums = np.concatenate([[0.0], np.cumsum(signal, dtype=np.float64)])
+    squares = np.concatenate([[0.0], np.cumsum(signal.astype(np.float64) ** 2)])
+    window_sum = sums[m:] - sums[:-m]
+    window_energy = np.maximum(squares[m:] - squares[:-m] - window_sum * window_sum / m, 1e-12)
+    ncc = corr / (np.sqrt(window_energy) * template_norm)
+
+    k = int(np.argmax(ncc))
+    shift = 0.0
+    if 0 < k < len(ncc) - 1:
+        # Parabola through the peak and its neighbours for sub-frame precision
+        left, peak, right = ncc[k - 1], ncc[k], ncc[k + 1]
+        denominator = left - 2 * peak + right
+        if denominator != 0:
+            shift = 0.5 * (left - right) / denominator
+    return k + shift, float(ncc[k])
+
+
+def find_fp_offset(stream_path, fp_path, stream_hint=None, fp_hint=None):
+    """
+    Lines the first person video up with the stream by finding an excerpt of its audio in the stream's
+    audio. Rough first-kill times, when given, narrow the search to the area around them. Returns
+    (offset, score) where fp time = stream time + offset, or (None, 0.0).
+    """
+    fp_start = max(fp_hint - 30.0, 0.0) if fp_hint is not None else 0.0
+    template = audio_onset_envelope(fp_path, fp_start, SYNC_PROBE_SECONDS)
+    if stream_hint is not None and fp_hint is not None:
+        search_start = max(stream_hint - (fp_hint - fp_start) - SYNC_SEARCH_SECONDS, 0.0)
+        search_duration = SYNC_PROBE_SECONDS + 2 * SYNC_SEARCH_SECONDS
+    else:
+        search_start, search_duration = 0.0, None
+    signal = audio_onset_envelope(stream_path, search_start, search_duration)
+    if template is None or signal is None:
+        return None, 0.0
+
+    position, score = locate_template(signal, template)
+    if position is None:
+        return None, 0.0
+    return fp_start - (search_start + position / SYNC_ENVELOPE_RATE), score
+
+
+def find_reference_sound(recording_path, sample_path, start=0.0, duration=None):
+    """
+    Finds where a short reference sample (e.g. the "first blood" callout) plays in a recording.
+    Returns (seconds into the recording, score), or (None, 0.0).
+    """
+    template = audio_onset_envelope(sample_path)
+    signal = audio_onset_envelope(recording_path, start, duration)
+    if template is None or signal is None:
+        return None, 0.0
+    position, score = locate_template(signal, template)
+    if position is None:
+        return None, 0.0
+    return start + position / SYNC_ENVELOPE_RATE, score
+
+# Session logs with several matches: a match's first kill is looked for with the first blood sample within
+# MATCH_ANCHOR_SEARCH_SECONDS of where the log clock puts it, and only trusted above MATCH_ANCHOR_MIN_SCORE
+MATCH_ANCHOR_SEARCH_SECONDS = 120
+MATCH_ANCHOR_MIN_SCORE = 0.5
+
+# Edit settings shared by the GUI and the headless batch mode; manifest jobs override any of them
+DEFAULT_SETTINGS = {
+    "distance_threshold": 50.0,
+    "time_before": 5,
+    "time_after": 3,
+    "visible_to_caster": True,
+    "players": None,  # None keeps every player
+    "parallel_jobs": default_parallel_jobs(),
+    "extraction_mode": "reencode",
+    "preview_quality": "full",
+    "pov_layout": "side_by_side",
+    "sprite_frames": 0,
+    "cache_budget_gb": 20,
+    "output_profiles": [],  # OUTPUT_PROFILES keys written along with the final video
+    # Audio energy analysis: trim the padding to the action, then keep the top N clips / a target length
+    "energy_trim": False,
+    "energy_top_n": 0,  # 0 keeps every clip
+    "target_reel_seconds": 0,  # 0 for no limit
+    "distributed_port": 0,  # Serve render jobs to worker agents on this port, 0 renders locally only
+    "match_gap_seconds": 180,  # A longer pause between kills starts a new match when a session is split
+    # Kill-feed overlay burned into the clips. The feed template gets {killer} and {victim}, the name card
+    # {killers}, {victims} and {kills}; an empty template turns that part off
+    "kill_feed": False,
+    "kill_feed_template": "{killer} → {victim}",
+    "name_card_template": "{killers}",
+    "kill_feed_position": "top_right",
+    "kill_feed_seconds": 4.0,
+    "overlay_font": "Arial",
+    "overlay_font_size": 4.0,  # Percent of the picture height
+    "overlay_color": "#FFFFFF",
+    "overlay_box_color": "#000000",
+    "overlay_box_opacity": 0.6,
+}
+
+
+def parse_hms(text):
+    """
+    Parses an hh:mm:ss or hh:mm:ss.mmm time entry into seconds. Raises ValueError on bad input.
+    """
+    text = text.strip()
+    parsed = datetime.strptime(text, "%H:%M:%S.%f" if "." in text else "%H:%M:%S")
+    return parsed.hour * 3600 + parsed.minute * 60 + parsed.second + parsed.microsecond / 1e6
+
+
+def format_timestamp(seconds):
+    # ffmpeg accepts hh:mm:ss.mmm for -ss and friends
+    seconds = max(0.0, seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{rest:06.3f}"
+
+
+def parse_timestamps(values):
+    """
+    Converts KillFeed ISO timestamps to float epoch seconds in one vectorized call, falling back to
+    datetime.fromisoformat for anything numpy can't parse (e.g. explicit UTC offsets).
+    """
+    import numpy as np
+    try:
+        stamps = np.array([value[:-1] if value.endswith("Z") else value for value in values], dtype="datetime64[ns]")
+        return stamps.astype("int64") / 1e9
+    except ValueError:
+        return np.array(
+            [datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() for value in values], dtype=np.float64
+        )
+
+
+class KillLog:
+    """
+    Columnar view of a KillFeed log: one numpy array per field instead of a dict per event. Timestamps are
+    float epoch seconds and players are interned to integer ids. The log can be extended with new lines
+    as the mod appends them, and per-player indexes make player filters cheap.
+    """
+    def __init__(self):
+        import numpy as np
+        self.times = np.empty(0, dtype=np.float64)
+        self.distance = np.empty(0, dtype=np.float32)
+        self.in_view = np.empty(0, dtype=bool)
+        self.killer_in_view = np.empty(0, dtype=bool)
+        self.killer = np.empty(0, dtype=np.int32)
+        self.killed = np.empty(0, dtype=np.int32)
+        self.players = []
+        self.player_ids = {}
+        self._by_killer = None
+        self._by_killed = None
+
+    @classmethod
+    def from_file(cls, path):
+        kill_log = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            kill_log.extend(f)
+        return kill_log
+
+    def subset(self, start, stop):
+        """
+        Events start to stop (e.g. one match of a session) as a KillLog of their own, with the same player ids.
+        """
+        part = KillLog()
+        for field in ("times", "distance", "in_view", "killer_in_view", "killer", "killed"):
+            setattr(part, field, getattr(self, field)[start:stop].copy())
+        part.players = list(self.players)
+        part.player_ids = dict(self.player_ids)
+        return part
+
+    def __len__(self):
+        return len(self.times)
+
+    def player_id(self, name):
+        if name not in self.player_ids:
+            self.player_ids[name] = len(self.players)
+            self.players.append(name)
+        return self.player_ids[name]
+
+    def extend(self, lines, strict=True):
+        """
+        Parses JSON lines (any iterable, e.g. an open file) and appends them. Returns the number of events added.
+        Unless strict, lines that aren't JSON objects are skipped instead of raising ValueError.
+        """
+        import numpy as np
+        stamps, distance, in_view, killer_in_view, killer, killed = [], [], [], [], [], []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                if strict:
+                    raise
+                continue
+            if not isinstance(event, dict) or "TimeStamp" not in event:
+                continue
+            stamps.append(event["TimeStamp"])
+            distance.append(event.get("CameraDistance") if event.get("CameraDistance") is not None else 9999)
+            in_view.append(bool(event.get("InView")))
+            killer_in_view.append(bool(event.get("KillerInView")))
+            killer.append(self.player_id(event.get("Killer", "Unknown")))
+            killed.append(self.player_id(event.get("Killed", "Unknown")))
+        if not stamps:
+            return 0
+
+        self.times = np.concatenate([self.times, parse_timestamps(stamps)])
+        self.distance = np.concatenate([self.distance, np.array(distance, dtype=np.float32)])
+        self.in_view = np.concatenate([self.in_view, np.array(in_view, dtype=bool)])
+        self.killer_in_view = np.concatenate([self.killer_in_view, np.array(killer_in_view, dtype=bool)])
+        self.killer = np.concatenate([self.killer, np.array(killer, dtype=np.int32)])
+        self.killed = np.concatenate([self.killed, np.array(killed, dtype=np.int32)])
+        self._by_killer = self._by_killed = None
+        return len(stamps)
+
+    def _group_by(self, ids):
+        # Event indices per player id, built with one stable sort instead of a Python loop
+        import numpy as np
+        order = np.argsort(ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(ids[order])) + 1
+        groups = np.split(order, boundaries)
+        return {int(ids[group[0]]): group for group in groups if len(group)}
+
+    def events_by_killer(self, player_id):
+        import numpy as np
+        if self._by_killer is None:
+            self._by_killer = self._group_by(self.killer)
+        return self._by_killer.get(player_id, np.empty(0, dtype=np.int64))
+
+    def events_by_killed(self, player_id):
+        import numpy as np
+        if self._by_killed is None:
+            self._by_killed = self._group_by(self.killed)
+        return self._by_killed.get(player_id, np.empty(0, dtype=np.int64))
+
+    def player_mask(self, players, as_killer=True, as_killed=False):
+        import numpy as np
+        mask = np.zeros(len(self), dtype=bool)
+        for name in players:
+            player_id = self.player_ids.get(name)
+            if player_id is None:
+                continue
+            if as_killer:
+                mask[self.events_by_killer(player_id)] = True
+            if as_killed:
+                mask[self.events_by_killed(player_id)] = True
+        return mask
+
+    def select(self, settings, start=0):
+        """
+        Boolean mask of the events from index start on that pass the visibility, distance and player filters.
+        """
+        mask = self.distance[start:] <= settings["distance_threshold"]
+        if settings["visible_to_caster"]:
+            mask &= self.killer_in_view[start:] & self.in_view[start:]
+        if settings["players"] is not None:
+            mask &= self.player_mask(settings["players"])[start:]
+        return mask
+
+
+def merge_intervals(starts, ends):
+    """
+    Merges overlapping (or touching) intervals. Returns (order, group): the stable sort order of the
+    inputs and, for each sorted interval, the index of the merged interval it belongs to.
+    """
+    import numpy as np
+    order = np.argsort(starts, kind="stable")
+    sorted_starts = starts[order]
+    running_end = np.maximum.accumulate(ends[order])
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = sorted_starts[1:] > running_end[:-1]
+    return order, np.cumsum(new_group) - 1
+
+
+def build_clip_list(kill_log, start_time_str, settings):
+    """
+    Filters the KillFeed events and merges overlapping before/after windows into clips, sorted by start.
+    Clip times are seconds into the recording. Raises ValueError with a user-facing message when the
+    input can't be used.
+    """
+    import numpy as np
+    try:
+        start_time = parse_hms(start_time_str)
+    except ValueError:
+        raise ValueError("Invalid time format. Use hh:mm:ss or hh:mm:ss.mmm.")
+
+    if not len(kill_log):
+        raise ValueError("No events found in log file.")
+
+    # Everything is anchored on the first event of the log, which the user syncs to the recording
+    selected = np.flatnonzero(kill_log.select(settings))
+    if not selected.size:
+        return []
+
+    actual_times = start_time + (kill_log.times[selected] - kill_log.times[0])
+    starts = np.maximum(actual_times - settings["time_before"], 0.0)
+    ends = actual_times + settings["time_after"]
+    order, group = merge_intervals(starts, ends)
+
+    merged_clips = []
+    boundaries = np.flatnonzero(np.diff(group)) + 1
+    for members in np.split(order, boundaries):
+        events = selected[members]
+        merged_clips.append({
+            "start": float(starts[members].min()),
+            "end": float(ends[members].max()),
+            "killers": [kill_log.players[k] for k in kill_log.killer[events]],
+            "killed_list": [kill_log.players[k] for k in kill_log.killed[events]],
+            "event_ids": events.tolist(),
+            "kill_times": actual_times[members].tolist(),
+        })
+    return merged_clips
+
+
+def split_matches(kill_log, gap_seconds):
+    """
+    Splits a session log into matches wherever no kill happens for more than gap_seconds. Returns
+    [(first_event, end_event)] index ranges in log order.
+    """
+    import numpy as np
+    if not len(kill_log):
+        return []
+    breaks = (np.flatnonzero(np.diff(kill_log.times) > gap_seconds) + 1).tolist()
+    bounds = [0] + breaks + [len(kill_log)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def match_anchors(kill_log, matches, first_kill, overrides=None, video_path=None, sample_path=None, log=print):
+    """
+    Works out where each match's first kill is in the recording, the first match's being first_kill. Each
+    later match is first placed by the log clock from the one before it; with sample_path that guess is
+    refined by finding the first blood sound near it, and overrides ({match number: "hh:mm:ss"}) win over
+    both. Returns [(seconds, source)] with source "entered", "manual", "audio" or "log".
+    """
+    overrides = overrides or {}
+    anchors = []
+    for k, (start, stop) in enumerate(matches):
+        override = overrides.get(str(k + 1))
+        if override:
+            anchors.append((parse_hms(override), "manual"))
+            continue
+        if k == 0:
+            anchors.append((parse_hms(first_kill), "entered"))
+            continue
+        # Chained from the previous match, so a correction carries over to the ones after it
+        previous_anchor, previous_source = anchors[-1]
+        expected = previous_anchor + float(kill_log.times[start] - kill_log.times[matches[k - 1][0]])
+        if sample_path:
+            window_start = max(expected - MATCH_ANCHOR_SEARCH_SECONDS, 0.0)
+            position, score = find_reference_sound(video_path, sample_path, window_start, 2 * MATCH_ANCHOR_SEARCH_SECONDS)
+            if position is not None and score >= MATCH_ANCHOR_MIN_SCORE:
+                log(f"Match {k + 1}: first blood at {format_timestamp(position)} ({position - expected:+.1f}s from the log clock).")
+                anchors.append((position, "audio"))
+                continue
+            log(f"Match {k + 1}: first blood sound not found near {format_timestamp(expected)}, using the log clock.")
+        anchors.append((expected, "log"))
+    return anchors
+
+class ClipCache:
+    """
+    Content-addressed store of rendered preview clips, so unchanged intervals are reused across runs.
+    Entries are evicted least recently used first once the cache directories exceed the disk budget.
+    """
+    def __init__(self, directory, budget_bytes, extra_dirs=(), owner=""):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.dirs = [directory] + list(extra_dirs)
+        # Worker agents sharing one cache each render into their own partial files
+        self.owner = "".join(c if c.isalnum() or c in "-_" else "_" for c in owner)
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def partial_path_for(self, key):
+        # Renders go to a partial file first so an interrupted job never looks like a cache hit
+        owner = f".{self.owner}" if self.owner else ""
+        return os.path.join(self.directory, f"{key}{owner}.partial.mp4")
+
+    def lookup(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        # The modification time doubles as the last-used time for LRU eviction
+        os.utime(path)
+        return path
+
+    def commit(self, key):
+        os.replace(self.partial_path_for(key), self.path_for(key))
+        return self.path_for(key)
+
+    def evict(self, keep=()):
+        """
+        Deletes the least recently used files until the cache fits the budget. Returns the bytes freed.
+        """
+        keep = {os.path.abspath(path) for path in keep if path}
+        entries = []
+        for directory in self.dirs:
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for mtime, size, path in entries)
+        freed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            if os.path.abspath(path) in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+        return freed
+
+
+class RenderCheckpoint:
+    """
+    Lists the segments of a final render in reel order and which of them are finished, rewritten after
+    every segment. The segments themselves live in the clip cache under content keys, so a rerun (after a
+    crash, or with a changed selection) only renders the ones that aren't there yet.
+    """
+    def __init__(self, path, output_path):
+        self.path = path
+        self.output_path = os.path.abspath(output_path)
+        self.segments = []
+        self.lock = threading.Lock()
+
+    def unfinished_run(self):
+        """
+        Returns (done, total) for an interrupted earlier render of the same output, or None.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if previous.get("complete") or previous.get("output") != self.output_path:
+            return None
+        segments = previous.get("segments", [])
+        return sum(1 for segment in segments if segment.get("done")), len(segments)
+
+    def add(self, key, clip):
+        self.segments.append({
+            "key": key, "start": clip["start"], "end": clip["end"], "path": None, "done": False
+        })
+        return len(self.segments) - 1
+
+    def done(self, idx, segment_path):
+        with self.lock:
+            self.segments[idx]["path"] = os.path.abspath(segment_path)
+            self.segments[idx]["done"] = True
+            self.save()
+
+    def save(self, complete=False):
+        report = {"output": self.output_path, "complete": complete, "segments": self.segments}
+        try:
+            with open(self.path + ".part", "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(self.path + ".part", self.path)
+        except OSError:
+            pass
+
+
+class ClipRenderer:
+    """
+    Renders preview clips and the final video for one recording. Has no GUI dependency: the Tk app and
+    the headless batch mode both drive it, and all output goes through the log callable. on_progress
+    (stage, fraction, eta) follows the ffmpeg encodes; preview stages are timed into timer.
+    fp_video_path is one POV video or a list of them, combined with the stream in pov_layout; the
+    matching fp_start_time arguments are one first kill time or a list with one per POV.
+    worker names the agent when the renderer runs coordinator jobs next to other machines. overlay is a
+    kill_feed_style, burned into every clip that is encoded.
+    """
+    def __init__(self, video_path, clips_dir=CLIPS_DIR, log=print, fp_video_path=None, cache_budget_gb=20,
+                 on_progress=None, timer=None, pov_layout="side_by_side", worker="", overlay=None):
+        self.video_path = video_path
+        self.clips_dir = clips_dir
+        self.fp_video_path = fp_video_path
+        self.pov_paths = pov_list(fp_video_path)
+        self.pov_layout = pov_layout
+        self.overlay = overlay
+        self.overlay_dir = os.path.join(clips_dir, "overlays")
+        # How the current previews were made, which render_final goes by (see remember_previews)
+        self.previewed = None
+        self.log = log
+        self.on_progress = on_progress
+        self.timer = timer or StageTimer()
+        self.thumb_dir = os.path.join(clips_dir, "thumbs")
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        self.clip_cache = ClipCache(
+            os.path.join(clips_dir, "cache"), int(cache_budget_gb * 1024 ** 3), extra_dirs=[self.thumb_dir],
+            owner=worker
+        )
+        self.sources = SourceIndex(os.path.join(clips_dir, "index"))
+
+    def probe_source(self, path):
+        # Every composite clip needs the same probes, so do them once per recording
+        return self.sources.media(path)
+
+    def plan_clips(self, merged_clips, mode, combine_fp=False):
+        """
+        Checks the clips against the recording's index before any job starts. Clips running past the end
+        of the recording are trimmed, or emptied (and then skipped) when they start after it. For smart
+        cuts, a start just after a keyframe moves back onto it so the whole clip can be stream-copied.
+        Updates the clips in place.
+        """
+        media = self.probe_source(self.video_path)
+        if not media:
+            return
+        duration = media["duration"]
+        snap = mode == "smartcut" and not combine_fp
+        for i, clip in enumerate(merged_clips):
+            if duration and clip["end"] > duration:
+                if clip["start"] >= duration:
+                    self.log(f"Clip {i+1} starts after the end of the recording ({format_timestamp(duration)}).")
+                    clip["end"] = clip["start"]
+                    continue
+                clip["end"] = duration
+            if snap:
+                keyframe = self.sources.keyframe_before(self.video_path, clip["start"])
+                if keyframe is not None and 0 < clip["start"] - keyframe <= KEYFRAME_SNAP_SECONDS:
+                    clip["start"] = keyframe
+
+    def analyze_clips(self, merged_clips, kill_log, stream_start_time, settings):
+        """
+        Applies the audio energy settings (trim, top N, target reel length) to the merged clips, using the
+        recording's cached loudness curve. Returns the clips to render, merged_clips itself when the
+        analysis is off or the recording has no audio.
+        """
+        top_n = int(settings.get("energy_top_n") or 0)
+        target_seconds = float(settings.get("target_reel_seconds") or 0)
+        if not (settings.get("energy_trim") or top_n or target_seconds):
+            return merged_clips
+        with self.timer.stage("energy"):
+            levels = self.sources.levels(self.video_path)
+            if levels is None or not levels.size:
+                self.log("No audio to analyze in the recording, keeping every clip.")
+                return merged_clips
+            first_kill = parse_hms(stream_start_time)
+            event_times = []
+            for clip in merged_clips:
+                times = first_kill + (kill_log.times[clip["event_ids"]] - kill_log.times[0])
+                event_times.append((float(times.min()), float(times.max())))
+            clips = score_and_trim_clips(merged_clips, event_times, levels, settings.get("energy_trim"))
+            clips = select_top_clips(clips, top_n, target_seconds)
+        before = sum(clip["end"] - clip["start"] for clip in merged_clips)
+        after = sum(clip["end"] - clip["start"] for clip in clips)
+        self.log(f"Audio analysis kept {len(clips)} of {len(merged_clips)} clips ({before:.0f}s -> {after:.0f}s).")
+        return clips
+
+    def pov_identity(self, fp_start_time):
+        # Everything about the POVs that changes a composite's pixels
+        return [source_identity(path) for path in self.pov_paths] + pov_list(fp_start_time) + [self.pov_layout]
+
+    def composite_key(self, clip, fp_start_time, quality="full"):
+        return clip_key(
+            self.video_path, clip["start"], clip["end"], *self.pov_identity(fp_start_time),
+            "composite", CLIP_ENCODINGS[quality]["tag"], *self.overlay_identity(clip)
+        )
+
+    def overlay_identity(self, clip):
+        # Everything about the kill feed that changes a clip's pixels
+        if not self.overlay:
+            return []
+        return ["overlay", json.dumps(
+            [self.overlay, clip["killers"], clip["killed_list"], clip.get("kill_times", [])], sort_keys=True
+        )]
+
+    def clip_overlay(self, clip, size):
+        """
+        Writes the clip's kill feed script to clips/overlays and returns the filter that burns it into a
+        picture of size (width, height), or None when there is nothing to show.
+        """
+        script = kill_feed_script(clip, size, self.overlay) if self.overlay else None
+        if not script:
+            return None
+        os.makedirs(self.overlay_dir, exist_ok=True)
+        script_path = os.path.join(self.overlay_dir, hashlib.sha1(script.encode("utf-8")).hexdigest()[:20] + ".ass")
+        if not os.path.exists(script_path):
+            # Written under a temporary name, as pool threads may write the same script at once
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.overlay_dir, suffix=".part", delete=False) as f:
+                f.write(script)
+            os.replace(f.name, script_path)
+        return f"ass=filename={filter_path(os.path.abspath(script_path))}"
+
+    def source_size(self):
+        media = self.probe_source(self.video_path)
+        return video_size(media) if media else (1280, 720)
+
+    def composite_sources(self, stream_start_time, fp_start_time):
+        """
+        Returns [(path, media, offset)] for the stream and every POV, where offset turns a stream time into
+        the same moment in that video, or None if one of them can't be read.
+        """
+        stream_first_kill = parse_hms(stream_start_time)
+        sources = [(self.video_path, self.probe_source(self.video_path), 0.0)]
+        for path, first_kill in zip(self.pov_paths, pov_list(fp_start_time)):
+            # Same offset from the first kill in every video
+            sources.append((path, self.probe_source(path), parse_hms(first_kill) - stream_first_kill))
+        if not all(media for path, media, offset in sources):
+            return None
+        return sources
+
+    def render_composite(self, clip, stream_start_time, fp_start_time, output_path, threads,
+                         thumb_path=None, sprite_path=None, sprite_frames=0, quality="full", on_progress=None):
+        """
+        Renders one merged clip combined with the POV videos. Returns (ok, error message).
+        """
+        sources = self.composite_sources(stream_start_time, fp_start_time)
+        if not sources:
+            return False, "Could not read the stream or a first-person video."
+        overlay = self.clip_overlay(clip, pov_layout_size([media for path, media, offset in sources], self.pov_layout))
+        return composite_clip(
+            [(path, media, clip["start"] + offset) for path, media, offset in sources], self.pov_layout,
+            clip["end"] - clip["start"], output_path, threads, thumb_path, sprite_path, sprite_frames, quality,
+            on_progress, overlay
+        )
+
+    def render_composite_passes(self, items, stream_start_time, fp_start_time, quality, stage):
+        """
+        Renders POV composites for (clip, output_path) items BATCH_CLIPS_PER_PASS at a time, each chunk with
+        one ffmpeg that reads the stream and every POV video once, front to back. Passes run one after
+        another with every core. Yields (positions in items, ok, error) as each pass finishes.
+        """
+        if not items:
+            return
+        sources = self.composite_sources(stream_start_time, fp_start_time)
+        if not sources:
+            yield list(range(len(items))), False, "Could not read the stream or a first-person video."
+            return
+        size = pov_layout_size([media for path, media, offset in sources], self.pov_layout)
+        order = sorted(range(len(items)), key=lambda k: items[k][0]["start"])
+        chunks = [order[offset:offset + BATCH_CLIPS_PER_PASS] for offset in range(0, len(order), BATCH_CLIPS_PER_PASS)]
+        spans = [max(items[k][0]["end"] for k in chunk) - items[chunk[0]][0]["start"] for chunk in chunks]
+        tracker = ProgressTracker(stage, sum(spans), self.on_progress)
+        for n, chunk in enumerate(chunks):
+            jobs = [(items[k][0]["start"], items[k][0]["end"], items[k][1], None, None) for k in chunk]
+            ok, stderr = composite_clips_single_pass(
+                sources, self.pov_layout, jobs, threads_per_job(1), 0, quality, tracker.job(n, spans[n]),
+                [self.clip_overlay(items[k][0], size) for k in chunk]
+            )
+            tracker.finish(n, spans[n])
+            yield chunk, ok, stderr
+
+    def render_previews(self, merged_clips, stream_start_time, fp_start_time, settings, on_result):
+        """
+        Renders every merged clip and calls on_result(result, completed, total) as each one finishes.
+        """
+        workers = max(1, int(settings["parallel_jobs"]))
+        threads = threads_per_job(workers)
+        combine_fp = bool(self.fp_video_path and fp_start_time)
+        mode = settings["extraction_mode"]
+        quality = settings["preview_quality"]
+        sprite_frames = int(settings["sprite_frames"])
+        self.remember_previews(stream_start_time, fp_start_time, mode, quality)
+        self.plan_clips(merged_clips, mode if quality != "proxy" else "reencode", combine_fp)
+        self.log(f"Total {len(merged_clips)} clips to generate ({workers} parallel jobs, {threads} threads each)...")
+
+        completed = 0
+        if settings.get("distributed_port"):
+            durations = [clip["end"] - clip["start"] for clip in merged_clips]
+            tracker = ProgressTracker("Extracting previews", sum(durations), self.on_progress)
+
+            def collect(i, payload):
+                nonlocal completed
+                tracker.finish(i, durations[i])
+                completed += 1
+                on_result(dict(payload, index=i, clip=merged_clips[i]), completed, len(merged_clips))
+            specs = [
+                self.job_spec(
+                    "preview", i, clip, stream_start_time, fp_start_time if combine_fp else None,
+                    "reencode" if mode == "batch" else mode, sprite_frames=sprite_frames, quality=quality
+                )
+                for i, clip in enumerate(merged_clips)
+            ]
+            self.distribute(specs, settings, collect)
+        elif mode == "batch" or combine_fp:
+            # Chunks run one after another so the recording (and every POV video) is read sequentially; each
+            # pass gets every core. Composites always go this way, or every POV would be opened once per clip
+            threads = threads_per_job(1)
+            indexed = list(enumerate(merged_clips))
+            chunks = [indexed[offset:offset + BATCH_CLIPS_PER_PASS] for offset in range(0, len(indexed), BATCH_CLIPS_PER_PASS)]
+            spans = [max(clip["end"] for i, clip in chunk) - chunk[0][1]["start"] for chunk in chunks]
+            tracker = ProgressTracker("Extracting previews", sum(spans), self.on_progress)
+            for k, chunk in enumerate(chunks):
+                for result in self.render_preview_batch(
+                    chunk, sprite_frames, threads, quality, tracker.job(k, spans[k]), stream_start_time,
+                    fp_start_time if combine_fp else None
+                ):
+                    completed += 1
+                    on_result(result, completed, len(merged_clips))
+                tracker.finish(k, spans[k])
+        else:
+            durations = [clip["end"] - clip["start"] for clip in merged_clips]
+            tracker = ProgressTracker("Extracting previews", sum(durations), self.on_progress)
+            # Results come back in completion order; callers keep their own clip order
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        self.render_preview, i, clip, stream_start_time, combine_fp, fp_start_time, mode, sprite_frames,
+                        threads, quality, tracker.job(i, durations[i])
+                    )
+                    for i, clip in enumerate(merged_clips)
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    tracker.finish(result["index"], durations[result["index"]])
+                    completed += 1
+                    on_result(result, completed, len(merged_clips))
+
+    def render_preview_batch(self, indexed_clips, sprite_frames, threads, quality="full", on_progress=None,
+                             stream_start_time=None, fp_start_time=None):
+        """
+        Extracts a chunk of merged clips, with thumbnails, from a single sequential read of the recording.
+        With fp_start_time the clips are POV composites and each POV video is read once as well.
+        """
+        identity = self.pov_identity(fp_start_time) if fp_start_time else []
+        results = []
+        jobs = []
+        pending = []
+        overlay_clips = []
+        for i, clip in indexed_clips:
+            result = {"index": i, "clip": clip, "clip_path": None, "thumb_path": None, "sprite_path": None, "messages": []}
+            results.append(result)
+            start = clip["start"]
+            end = clip["end"]
+            if end <= start:
+                result["messages"].append(f"Skipping clip {i+1} with non-positive duration.")
+                continue
+            thumb_path, sprite_path = thumbnail_paths(self.thumb_dir, clip_key(self.video_path, start, end, *identity), sprite_frames)
+            thumb_todo = None if os.path.exists(thumb_path) else thumb_path
+            sprite_todo = sprite_path if sprite_path and not os.path.exists(sprite_path) else None
+            result["thumb_path"] = thumb_path
+            result["sprite_path"] = sprite_path
+
+            if fp_start_time:
+                cache_key = self.composite_key(clip, fp_start_time, quality)
+            else:
+                cache_key = clip_key(
+                    self.video_path, start, end, "reencode", CLIP_ENCODINGS[quality]["tag"], *self.overlay_identity(clip)
+                )
+            result["clip_path"] = self.clip_cache.lookup(cache_key)
+            if result["clip_path"] and not thumb_todo and not sprite_todo:
+                result["messages"].append(f"Reusing cached clip {i+1}")
+                continue
+            if result["clip_path"]:
+                # Clip is cached but its images aren't (e.g. a new sprite size), render just those
+                with self.timer.stage("thumbnails"):
+                    self.generate_thumbnail(result["clip_path"], thumb_todo, sprite_todo, sprite_frames, end - start, result["messages"])
+                continue
+            jobs.append((start, end, self.clip_cache.partial_path_for(cache_key), thumb_todo, sprite_todo))
+            pending.append((result, cache_key))
+            overlay_clips.append(clip)
+        if not jobs:
+            return results
+
+        self.log(f"Extracting {len(jobs)} clips in a single pass...")
+        with self.timer.stage("extraction"):
+            if fp_start_time:
+                sources = self.composite_sources(stream_start_time, fp_start_time)
+                if sources:
+                    size = pov_layout_size([media for path, media, offset in sources], self.pov_layout)
+                    ok, stderr = composite_clips_single_pass(
+                        sources, self.pov_layout, jobs, threads, sprite_frames, quality, on_progress,
+                        [self.clip_overlay(clip, size) for clip in overlay_clips]
+                    )
+                else:
+                    ok, stderr = False, "Could not read the stream or a first-person video."
+            else:
+                source = self.probe_source(self.video_path)
+                has_audio = bool(source) and any(st.get("codec_type") == "audio" for st in source["streams"])
+                ok, stderr = extract_clips_single_pass(
+                    self.video_path, jobs, threads, has_audio, sprite_frames, quality, on_progress,
+                    [self.clip_overlay(clip, self.source_size()) for clip in overlay_clips]
+                )
+        if not ok:
+            results[0]["messages"] += [f"Failed to extract clips {indexed_clips[0][0]+1}-{indexed_clips[-1][0]+1}", stderr]
+        for result, cache_key in pending:
+            if ok:
+                result["clip_path"] = self.clip_cache.commit(cache_key)
+            else:
+                result["clip_path"] = None
+        for result in results:
+            if result["thumb_path"] and not os.path.exists(result["thumb_path"]):
+                result["thumb_path"] = None
+            if result["sprite_path"] and not os.path.exists(result["sprite_path"]):
+                result["sprite_path"] = None
+        return results
+
+    def render_preview(self, i, clip, stream_start_time, combine_fp, fp_start_time, mode, sprite_frames, threads,
+                       quality="full", on_progress=None):
+        """
+        Worker job: extracts one merged clip and its thumbnail. Runs on a pool thread, so it only
+        collects log messages and never touches the widgets.
+        """
+        result = {"index": i, "clip": clip, "clip_path": None, "thumb_path": None, "sprite_path": None, "messages": []}
+        messages = result["messages"]
+        start = clip["start"]
+        end = clip["end"]
+        killers = ", ".join(clip["killers"])
+        killed = ", ".join(clip["killed_list"])
+
+        start_str = format_timestamp(start)
+        duration = end - start
+        if duration <= 0:
+            messages.append(f"Skipping clip {i+1} with non-positive duration.")
+            return result
+
+        identity = self.pov_identity(fp_start_time) if combine_fp else []
+        thumb_path, sprite_path = thumbnail_paths(self.thumb_dir, clip_key(self.video_path, start, end, *identity), sprite_frames)
+        thumb_todo = None if os.path.exists(thumb_path) else thumb_path
+        sprite_todo = sprite_path if sprite_path and not os.path.exists(sprite_path) else None
+        decoded_images = False
+
+        # A smart cut copies source packets, which defeats the point of a proxy and leaves nothing to draw on
+        if (quality == "proxy" or self.overlay) and mode == "smartcut":
+            mode = "reencode"
+        if combine_fp:
+            cache_key = self.composite_key(clip, fp_start_time, quality)
+        else:
+            cache_key = clip_key(self.video_path, start, end, mode, CLIP_ENCODINGS[quality]["tag"], *self.overlay_identity(clip))
+        clip_filename = self.clip_cache.partial_path_for(cache_key)
+        cached_path = self.clip_cache.lookup(cache_key)
+
+        with self.timer.stage("cache" if cached_path else "extraction"):
+            if cached_path:
+                messages.append(f"Reusing cached clip {i+1}: {start_str} +{duration:.2f}s {killers} → {killed} ")
+            # --- New logic for side-by-side preview ---
+            elif combine_fp:
+                messages.append(f"Rendering POV composite clip {i+1}: {start_str} +{duration:.2f}s {killers} → {killed} ")
+                ok, error = self.render_composite(
+                    clip, stream_start_time, fp_start_time, clip_filename, threads, thumb_todo, sprite_todo, sprite_frames,
+                    quality, on_progress
+                )
+                decoded_images = True
+                if not ok:
+                    messages.append(f"Failed to create POV composite preview for clip {i+1}")
+                    messages.append(error)
+                    return result
+            elif mode == "smartcut" and smart_cut_clip(
+                self.video_path, start, duration, clip_filename, threads, messages, self.sources
+            ):
+                messages.append(f"Smart-cut clip {i+1}: {start_str} +{duration:.2f}s {killers} → {killed} ")
+            else:
+                decoded_images = True
+                messages.append(f"Extracting clip {i+1}: {start_str} +{duration:.2f}s {killers} → {killed} ")
+                ok, error = extract_clip(
+                    self.video_path, start, duration, clip_filename, threads, thumb_todo, sprite_todo, sprite_frames, quality,
+                    on_progress, self.clip_overlay(clip, self.source_size())
+                )
+                if not ok:
+                    messages.append(f"Failed to extract clip {i+1}")
+                    messages.append(error)
+                    return result
+
+        result["clip_path"] = clip_filename = cached_path or self.clip_cache.commit(cache_key)
+
+        if not decoded_images:
+            with self.timer.stage("thumbnails"):
+                self.generate_thumbnail(clip_filename, thumb_todo, sprite_todo, sprite_frames, duration, messages)
+        if os.path.exists(thumb_path):
+            result["thumb_path"] = thumb_path
+            if sprite_path and os.path.exists(sprite_path):
+                result["sprite_path"] = sprite_path
+        else:
+            messages.append(f"Failed to generate thumbnail for clip {i+1}")
+        return result
+
+    def generate_thumbnail(self, clip_path, thumb_path, sprite_path, sprite_frames, duration, messages):
+        # Only used when the extraction pass itself didn't decode the clip (smart cut, composites)
+        graph, outputs = preview_image_graph(
+            "0:v", 0, min(1.0, duration / 2), duration, thumb_path, sprite_path, sprite_frames
+        )
+        if not outputs:
+            return True
+        cmd = ["ffmpeg", "-y", "-i", clip_path, "-filter_complex", ";".join(graph)] + outputs
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            messages.append(f"Failed to generate thumbnail for {clip_path}")
+            messages.append(proc.stderr.decode())
+            return False
+        return True
+
+    def source_segment_key(self, clip, fp_start_time, mode):
+        if fp_start_time:
+            return self.composite_key(clip, fp_start_time, "final")
+        if self.overlay and mode == "smartcut":
+            mode = "reencode"
+        return clip_key(
+            self.video_path, clip["start"], clip["end"], mode, CLIP_ENCODINGS["final"]["tag"], *self.overlay_identity(clip)
+        )
+
+    def render_source_segment(self, idx, clip, stream_start_time, fp_start_time, mode, cache_key, threads,
+                              on_progress=None):
+        """
+        Worker job: cuts one selected clip from the original recording(s) at final quality into the clip
+        cache. Returns (segment_path or None, messages).
+        """
+        messages = []
+        duration = clip["end"] - clip["start"]
+        segment_path = self.clip_cache.partial_path_for(cache_key)
+        if fp_start_time:
+            ok, error = self.render_composite(
+                clip, stream_start_time, fp_start_time, segment_path, threads, quality="final", on_progress=on_progress
+            )
+        elif mode == "smartcut" and not self.overlay and smart_cut_clip(
+            self.video_path, clip["start"], duration, segment_path, threads, messages, self.sources
+        ):
+            ok, error = True, ""
+        else:
+            ok, error = extract_clip(
+                self.video_path, clip["start"], duration, segment_path, threads, quality="final", on_progress=on_progress,
+                overlay=self.clip_overlay(clip, self.source_size())
+            )
+        if not ok:
+            messages += [f"Failed to render clip {idx+1} from the recording", error]
+            return None, messages
+        return self.clip_cache.commit(cache_key), messages
+
+    def render_source_segments(self, selected, stream_start_time, fp_start_time, settings, checkpoint):
+        workers = max(1, int(settings["parallel_jobs"]))
+        threads = threads_per_job(workers)
+        mode = settings["extraction_mode"]
+        durations = [clip["end"] - clip["start"] for path, clip in selected]
+        tracker = ProgressTracker("Rendering clips", sum(durations), self.on_progress)
+
+        # Segments rendered by an earlier (interrupted or differently selected) run are reused as they are
+        segments = [None] * len(selected)
+        todo = []
+        for idx, (path, clip) in enumerate(selected):
+            cache_key = self.source_segment_key(clip, fp_start_time, mode)
+            slot = checkpoint.add(cache_key, clip)
+            cached_path = self.clip_cache.lookup(cache_key)
+            if cached_path:
+                segments[idx] = cached_path
+                checkpoint.done(slot, cached_path)
+                tracker.finish(idx, durations[idx])
+            else:
+                todo.append((idx, clip, cache_key, slot))
+        if len(todo) < len(selected):
+            self.log(f"{len(selected) - len(todo)} of {len(selected)} clips are already rendered.")
+        self.log(f"Rendering {len(todo)} clips from the recording at full quality...")
+
+        if settings.get("distributed_port"):
+            slots = [(idx, slot) for idx, clip, cache_key, slot in todo]
+
+            def collect(k, payload):
+                idx, slot = slots[k]
+                tracker.finish(idx, durations[idx])
+                for message in payload["messages"]:
+                    self.log(message)
+                if payload["clip_path"]:
+                    segments[idx] = payload["clip_path"]
+                    checkpoint.done(slot, payload["clip_path"])
+            specs = [
+                self.job_spec("segment", idx, clip, stream_start_time, fp_start_time, mode, cache_key=cache_key)
+                for idx, clip, cache_key, slot in todo
+            ]
+            self.distribute(specs, settings, collect)
+            return [segment for segment in segments if segment]
+
+        if fp_start_time:
+            # Composites read the stream and every POV once per pass rather than once per clip
+            items = [(clip, self.clip_cache.partial_path_for(cache_key)) for idx, clip, cache_key, slot in todo]
+            for positions, ok, error in self.render_composite_passes(
+                items, stream_start_time, fp_start_time, "final", "Rendering clips"
+            ):
+                if not ok:
+                    self.log(f"Failed to render {len(positions)} POV composite clips from the recordings")
+                    self.log(error)
+                    continue
+                for k in positions:
+                    idx, clip, cache_key, slot = todo[k]
+                    segments[idx] = self.clip_cache.commit(cache_key)
+                    checkpoint.done(slot, segments[idx])
+            return [segment for segment in segments if segment]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    self.render_source_segment, idx, clip, stream_start_time, fp_start_time, mode, cache_key, threads,
+                    tracker.job(idx, durations[idx])
+                ): (idx, slot)
+                for idx, clip, cache_key, slot in todo
+            }
+            for future in as_completed(futures):
+                idx, slot = futures[future]
+                segment_path, messages = future.result()
+                tracker.finish(idx, durations[idx])
+                for message in messages:
+                    self.log(message)
+                if segment_path:
+                    segments[idx] = segment_path
+                    checkpoint.done(slot, segment_path)
+        # Back in reel order
+        return [segment for segment in segments if segment]
+
+    def job_spec(self, kind, index, clip, stream_start_time, fp_start_time, mode, **extra):
+        """
+        Describes one render job for a worker agent. Paths are absolute, as every machine is expected to see
+        the recordings and the clips folder at the same place.
+        """
+        spec = {
+            "kind": kind, "index": index, "clip": clip, "mode": mode,
+            "video": os.path.abspath(self.video_path), "povs": [os.path.abspath(path) for path in self.pov_paths],
+            "pov_layout": self.pov_layout, "overlay": self.overlay, "clips_dir": os.path.abspath(self.clips_dir),
+            "stream_start": stream_start_time, "fp_start": fp_start_time or None,
+        }
+        spec.update(extra)
+        return spec
+
+    def distribute(self, specs, settings, on_result):
+        """
+        Serves specs to worker agents on settings["distributed_port"] while parallel_jobs local agents
+        work through them too. on_result(job_number, payload) runs on this thread.
+        """
+        coordinator = RenderCoordinator(specs, log=self.log)
+        workers = max(1, int(settings["parallel_jobs"]))
+        coordinator.run(int(settings["distributed_port"]), on_result, workers, threads_per_job(workers))
+        failed = sum(1 for job in coordinator.jobs if job["state"] == "failed")
+        if failed:
+            self.log(f"{failed} jobs failed after {COORDINATOR_MAX_ATTEMPTS} attempts.")
+
+    def remember_previews(self, stream_start_time, fp_start_time, mode, quality):
+        """
+        Records the first kill times, extraction mode and quality the previews are rendered with. The
+        controls can change before the final render, which has to match the previews it joins.
+        """
+        self.previewed = {
+            "stream_start": stream_start_time, "fp_start": fp_start_time, "extraction_mode": mode,
+            "preview_quality": quality,
+        }
+
+    def render_final(self, selected, stream_start_time, fp_start_time, intro_path, outro_path, settings, output_path):
+        """
+        Joins the selected previews, given as (clip_path, clip) pairs in reel order, with the optional intro
+        and outro. Proxy previews are replaced by full-quality cuts from the recording. Returns True on success.
+        The first kill times, mode and quality the previews were rendered with win over the ones passed in.
+        """
+        if self.previewed:
+            previewed = self.previewed
+            if (stream_start_time, fp_start_time, settings["extraction_mode"], settings["preview_quality"]) != (
+                previewed["stream_start"], previewed["fp_start"], previewed["extraction_mode"],
+                previewed["preview_quality"]
+            ):
+                self.log("The first kill times, extraction mode or preview quality changed since the previews were "
+                         "made; the final video is rendered the way the previews were.")
+            stream_start_time, fp_start_time = previewed["stream_start"], previewed["fp_start"]
+            settings = dict(
+                settings, extraction_mode=previewed["extraction_mode"], preview_quality=previewed["preview_quality"]
+            )
+        final_inputs = []
+        parallel_jobs = max(1, int(settings["parallel_jobs"]))
+        timer = StageTimer()
+        checkpoint = RenderCheckpoint(os.path.splitext(output_path)[0] + "_segments.json", output_path)
+        unfinished = checkpoint.unfinished_run()
+        if unfinished:
+            self.log(f"Resuming an interrupted render ({unfinished[0]} of {unfinished[1]} segments were done).")
+
+        # Optional intro
+        if intro_path and Path(intro_path).exists():
+            final_inputs.append(intro_path)
+
+        combine_fp = bool(self.fp_video_path and fp_start_time)
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+            if combine_fp:
+                try:
+                    for first_kill in pov_list(fp_start_time) + [stream_start_time]:
+                        parse_hms(first_kill)
+                except ValueError:
+                    self.log("Invalid first kill time for stream or FP video. Use hh:mm:ss or hh:mm:ss.mmm.")
+                    return False
+
+            if settings["preview_quality"] == "proxy":
+                # Proxies were only for picking clips; cut the selection from the recording at full quality
+                with timer.stage("encode"):
+                    final_inputs += self.render_source_segments(
+                        selected, stream_start_time, fp_start_time if combine_fp else None, settings, checkpoint
+                    )
+            elif combine_fp:
+                # The composite previews are encoded exactly like a final segment, so reuse any that match
+                segments = [None] * len(selected)
+                todo = []
+                for idx, (path, clip) in enumerate(selected):
+                    cache_key = self.composite_key(clip, fp_start_time)
+                    slot = checkpoint.add(cache_key, clip)
+                    cached_path = self.clip_cache.lookup(cache_key)
+                    if cached_path:
+                        segments[idx] = cached_path
+                        checkpoint.done(slot, cached_path)
+                    else:
+                        todo.append((idx, cache_key, slot))
+
+                if todo:
+                    self.log(f"Rendering {len(todo)} POV composite clips for the final video.")
+                items = [(selected[idx][1], self.clip_cache.partial_path_for(cache_key)) for idx, cache_key, slot in todo]
+                with timer.stage("encode"):
+                    for positions, ok, error in self.render_composite_passes(
+                        items, stream_start_time, fp_start_time, "full", "Rendering clips"
+                    ):
+                        if not ok:
+                            self.log(f"Failed to create {len(positions)} POV composite clips: {error}")
+                            continue
+                        for k in positions:
+                            idx, cache_key, slot = todo[k]
+                            segments[idx] = self.clip_cache.commit(cache_key)
+                            checkpoint.done(slot, segments[idx])
+                # Back in reel order
+                final_inputs += [segment for segment in segments if segment]
+
+            else:
+                # Main selected clips (original behavior)
+                for path, clip in selected:
+                    if Path(path).exists():
+                        final_inputs.append(path)
+                        checkpoint.done(checkpoint.add(Path(path).stem, clip), path)
+
+            # Optional outro
+            if outro_path and Path(outro_path).exists():
+                final_inputs.append(outro_path)
+
+            # Concatenate all
+            if not final_inputs:
+                self.log("No valid clips to concatenate.")
+                return False
+
+            self.log(f"Generating final video: stitching {len(final_inputs)} clips together.")
+            # Joined into a partial file so an interrupted join never leaves a truncated video behind
+            base, ext = os.path.splitext(output_path)
+            partial_path = f"{base}.partial{ext or '.mp4'}"
+            if not concat_media(final_inputs, partial_path, work_dir, parallel_jobs, self.log, self.on_progress, timer):
+                self.log("Failed to generate the final video.")
+                return False
+            os.replace(partial_path, output_path)
+            checkpoint.save(complete=True)
+
+            profiles = [name for name in settings.get("output_profiles", []) if name in OUTPUT_PROFILES]
+            if profiles:
+                has_intro = bool(intro_path and Path(intro_path).exists())
+                has_outro = bool(outro_path and Path(outro_path).exists())
+                if not self.export_profiles(output_path, final_inputs, profiles, has_intro, has_outro, timer):
+                    return False
+
+        self.log(f"Edited video generation complete: {output_path}")
+        timer.report(self.log, os.path.splitext(output_path)[0] + "_timings.json")
+        return True
+
+    def export_profiles(self, output_path, final_inputs, profiles, has_intro, has_outro, timer):
+        """
+        Writes the extra output profiles from one decode of the finished video. Returns True on success.
+        """
+        media = probe_media(output_path)
+        if not media:
+            self.log("Could not read the final video for the extra outputs.")
+            return False
+        # Clip boundaries in the joined video, from the inputs concat_media could read
+        boundaries = []
+        for path in final_inputs:
+            part = probe_media(path)
+            if part:
+                boundaries.append((boundaries[-1] if boundaries else 0.0) + part["duration"])
+        first_clip = 1 if has_intro else 0
+        clip_count = len(boundaries) - first_clip - (1 if has_outro else 0)
+
+        labels = ", ".join(OUTPUT_PROFILES[name]["label"] for name in profiles)
+        self.log(f"Writing extra outputs from one decode: {labels}...")
+        has_audio = any(st.get("codec_type") == "audio" for st in media["streams"])
+        tracker = ProgressTracker("Extra outputs", media["duration"], self.on_progress)
+        with timer.stage("export"):
+            ok, stderr = export_profiles(
+                output_path, profiles, os.path.splitext(output_path)[0], boundaries, threads_per_job(1),
+                first_clip, clip_count, has_audio, tracker.job("export", media["duration"])
+            )
+        if not ok:
+            self.log("Failed to write the extra outputs:")
+            self.log(stderr)
+        return ok
+
+
+class LiveSession:
+    """
+    Cuts highlights while the match is still running. Tails the KillFeed log as the mod appends to it,
+    merges new events into the open interval, and hands each clip to the renderer as soon as the
+    recording has moved past it. Only MKV (or other streamable) recordings can be read while growing.
+    """
+    def __init__(self, renderer, log_path, start_time_str, fp_start_time, settings, on_result,
+                 log=print, poll_interval=1.0, safety_margin=2.0):
+        self.renderer = renderer
+        self.log_path = log_path
+        self.stream_start_time = start_time_str
+        self.start_time = parse_hms(start_time_str)
+        self.fp_start_time = fp_start_time
+        self.settings = settings
+        self.on_result = on_result
+        self.log = log
+        self.poll_interval = poll_interval
+        self.safety_margin = safety_margin
+
+        self.kill_log = KillLog()
+        self.clips = []
+        self.open_clip = None
+        self.next_event = 0
+        self.read_offset = 0
+        self.partial_line = b""
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def poll_log(self):
+        """
+        Reads whatever the mod appended since the last poll; a trailing partial line waits for the next one.
+        """
+        try:
+            if os.path.getsize(self.log_path) <= self.read_offset:
+                return 0
+            with open(self.log_path, "rb") as f:
+                f.seek(self.read_offset)
+                data = f.read()
+        except OSError:
+            return 0
+        self.read_offset += len(data)
+        lines = (self.partial_line + data).split(b"\n")
+        self.partial_line = lines.pop()
+        # A line the mod garbled (or one cut by a crash) shouldn't end the session
+        return self.kill_log.extend((line.decode("utf-8", errors="replace") for line in lines), strict=False)
+
+    def recording_position(self):
+        # KillFeed stamps events with the wall clock and the recording runs in real time, so the
+        # recording has reached the first kill's offset plus the time elapsed since that kill
+        return self.start_time + (time.time() - self.kill_log.times[0])
+
+    def merge_new_events(self):
+        import numpy as np
+        if self.next_event >= len(self.kill_log):
+            return []
+        first = self.next_event
+        selected = np.flatnonzero(self.kill_log.select(self.settings, start=first)) + first
+        self.next_event = len(self.kill_log)
+
+        closed = []
+        for event in selected.tolist():
+            actual = self.start_time + float(self.kill_log.times[event] - self.kill_log.times[0])
+            start = max(actual - self.settings["time_before"], 0.0)
+            end = actual + self.settings["time_after"]
+            killer = self.kill_log.players[self.kill_log.killer[event]]
+            killed = self.kill_log.players[self.kill_log.killed[event]]
+            if self.open_clip and start <= self.open_clip["end"]:
+                self.open_clip["end"] = max(self.open_clip["end"], end)
+                self.open_clip["killers"].append(killer)
+                self.open_clip["killed_list"].append(killed)
+                self.open_clip["event_ids"].append(event)
+                self.open_clip["kill_times"].append(actual)
+            else:
+                if self.open_clip:
+                    closed.append(self.open_clip)
+                self.open_clip = {
+                    "start": start, "end": end, "killers": [killer], "killed_list": [killed], "event_ids": [event],
+                    "kill_times": [actual]
+                }
+        return closed
+
+    def ready_clips(self, flush=False):
+        closed = self.merge_new_events()
+        # A later kill can only extend the open clip while its "before" window still overlaps it
+        if self.open_clip and (
+            flush or self.recording_position() >= self.open_clip["end"] + self.settings["time_before"] + self.safety_margin
+        ):
+            closed.append(self.open_clip)
+            self.open_clip = None
+        return closed
+
+    def run(self):
+        workers = max(1, int(self.settings["parallel_jobs"]))
+        threads = threads_per_job(workers)
+        combine_fp = bool(self.renderer.fp_video_path and self.fp_start_time)
+        # Reading the growing recording in one pass isn't possible, and its keyframe index would have to be
+        # rebuilt from the start for every clip, so every mode cuts each clip with a plain re-encode
+        mode = "reencode"
+        sprite_frames = int(self.settings["sprite_frames"])
+        completed = 0
+        self.renderer.remember_previews(self.stream_start_time, self.fp_start_time, mode, self.settings["preview_quality"])
+
+        self.log(f"Live mode: watching {self.log_path}")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = set()
+            while True:
+                stopping = self.stop_event.is_set()
+                self.poll_log()
+                if len(self.kill_log):
+                    for clip in self.ready_clips(flush=stopping):
+                        i = len(self.clips)
+                        self.clips.append(clip)
+                        self.log(f"Live mode: clip {i+1} ready ({', '.join(clip['killers'])})")
+                        futures.add(pool.submit(
+                            self.renderer.render_preview, i, clip, self.stream_start_time, combine_fp,
+                            self.fp_start_time, mode, sprite_frames, threads, self.settings["preview_quality"]
+                        ))
+
+                done = {future for future in futures if future.done()}
+                if stopping:
+                    done = futures
+                for future in done:
+                    completed += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.log(f"Live mode: a clip failed to render: {e}")
+                        continue
+                    self.on_result(result, completed, completed + len(futures) - len(done))
+                futures -= done
+
+                if stopping:
+                    break
+                self.stop_event.wait(self.poll_interval)
+        self.log(f"Live mode stopped after {len(self.clips)} clips.")
+
+
+class RenderCoordinator:
+    """
+    Hands render jobs to worker agents over HTTP. Workers POST to /lease for a job, to /heartbeat while
+    they work on it and to /result when done; everything is JSON. Jobs whose worker stops sending
+    heartbeats or fails are queued again (up to COORDINATOR_MAX_ATTEMPTS), and slow jobs are duplicated
+    onto idle workers once nothing else is queued. Outputs go to storage shared by all machines, so a
+    result only carries paths.
+    """
+    def __init__(self, specs, log=print, lease_seconds=COORDINATOR_LEASE_SECONDS, max_attempts=COORDINATOR_MAX_ATTEMPTS):
+        self.jobs = [
+            {"spec": spec, "state": "queued", "attempts": 0, "leases": {}, "started": None} for spec in specs
+        ]
+        self.queue = deque(range(len(specs)))
+        self.log = log
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.durations = []
+        self.results = queue.Queue()
+        self.remaining = len(specs)
+        self.lock = threading.Lock()
+
+    def lease(self, worker):
+        with self.lock:
+            self.expire_leases()
+            now = time.monotonic()
+            # A worker whose lease had expired may still have finished a job that was queued again
+            while self.queue and self.jobs[self.queue[0]]["state"] != "queued":
+                self.queue.popleft()
+            if self.queue:
+                job_id = self.queue.popleft()
+            else:
+                job_id = self.straggler(now)
+                if job_id is None:
+                    return {"done": not self.remaining}
+                self.log(f"Job {job_id + 1} is running long, also giving it to {worker}.")
+            job = self.jobs[job_id]
+            job["state"] = "running"
+            job["attempts"] += 1
+            job["leases"][worker] = now + self.lease_seconds
+            if job["started"] is None:
+                job["started"] = now
+            return {"job": {"id": job_id, "spec": job["spec"], "lease_seconds": self.lease_seconds}}
+
+    def straggler(self, now):
+        import numpy as np
+        if not self.durations:
+            return None
+        limit = STRAGGLER_FACTOR * float(np.median(self.durations))
+        running = [
+            (now - job["started"], job_id) for job_id, job in enumerate(self.jobs)
+            if job["state"] == "running" and len(job["leases"]) == 1 and job["attempts"] < self.max_attempts
+        ]
+        slow = [(elapsed, job_id) for elapsed, job_id in running if elapsed > limit]
+        return max(slow)[1] if slow else None
+
+    def heartbeat(self, worker, job_id):
+        with self.lock:
+            job = self.jobs[job_id]
+            if worker not in job["leases"]:
+                # The lease expired and the job went to someone else; tell the worker to give up
+                return {"ok": False}
+            job["leases"][worker] = time.monotonic() + self.lease_seconds
+            return {"ok": True}
+
+    def result(self, worker, job_id, ok, payload):
+        with self.lock:
+            job = self.jobs[job_id]
+            job["leases"].pop(worker, None)
+            if job["state"] in ("done", "failed"):
+                return {"ok": True}  # A duplicate of a straggler finished second
+            if ok:
+                # Also taken when the lease had expired and the job is queued again; it's done either way
+                self.finish(job_id, payload)
+                job["state"] = "done"
+                if job["started"] is not None:
+                    self.durations.append(time.monotonic() - job["started"])
+            elif job["state"] == "running" and not job["leases"]:
+                self.log(f"Job {job_id + 1} failed on {worker}.")
+                self.retry(job_id, payload)
+            return {"ok": True}
+
+    def expire_leases(self):
+        now = time.monotonic()
+        for job_id, job in enumerate(self.jobs):
+            if job["state"] != "running":
+                continue
+            for worker, deadline in list(job["leases"].items()):
+                if deadline < now:
+                    self.log(f"Worker {worker} stopped responding, job {job_id + 1} goes back in the queue.")
+                    del job["leases"][worker]
+            if not job["leases"]:
+                self.retry(job_id, {"messages": ["Worker stopped responding."]})
+
+    def retry(self, job_id, payload):
+        job = self.jobs[job_id]
+        if job["attempts"] < self.max_attempts:
+            job["state"] = "queued"
+            job["started"] = None
+            self.queue.append(job_id)
+        else:
+            job["state"] = "failed"
+            self.finish(job_id, dict(payload, failed=True))
+
+    def finish(self, job_id, payload):
+        # Failed jobs only carry messages; callers always get every path key
+        payload = dict({"clip_path": None, "thumb_path": None, "sprite_path": None, "messages": []}, **payload)
+        self.remaining -= 1
+        self.results.put((job_id, payload))
+
+    def run(self, port, on_result, local_workers=0, threads=None):
+        """
+        Serves the jobs on port until every one is done or has failed, calling on_result(job_id, payload)
+        on this thread as results come in. local_workers agents run in this process as well, so the
+        coordinating machine does its share.
+        """
+        server = coordinator_server(self, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        self.log(f"Coordinator listening on port {server.server_address[1]} for {len(self.jobs)} jobs.")
+        stop = threading.Event()
+        agents = [
+            threading.Thread(target=run_worker, args=(url, f"local-{k + 1}", threads, lambda message: None, stop))
+            for k in range(local_workers)
+        ]
+        for agent in agents:
+            agent.start()
+        try:
+            handled = 0
+            while handled < len(self.jobs):
+                try:
+                    job_id, payload = self.results.get(timeout=1.0)
+                except queue.Empty:
+                    with self.lock:
+                        self.expire_leases()
+                    continue
+                handled += 1
+                on_result(job_id, payload)
+        finally:
+            stop.set()
+            for agent in agents:
+                agent.join()
+            server.shutdown()
+            server.server_close()
+
+
+def coordinator_server(coordinator, port):
+    """
+    Returns an HTTP server for coordinator on port (0 picks a free one). http.server is only imported
+    here, when a distributed render starts.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            coordinator = self.server.coordinator
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/lease":
+                    reply = coordinator.lease(request["worker"])
+                elif self.path == "/heartbeat":
+                    reply = coordinator.heartbeat(request["worker"], request["job"])
+                elif self.path == "/result":
+                    reply = coordinator.result(request["worker"], request["job"], request["ok"], request.get("payload", {}))
+                else:
+                    self.send_error(404)
+                    return
+            except (ValueError, KeyError, IndexError):
+                self.send_error(400)
+                return
+            except Exception as e:
+                coordinator.log(f"Coordinator error on {self.path}: {e}")
+                self.send_error(500)
+                return
+            body = json.dumps(reply).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Every poll would end up on stderr otherwise
+
+    server = ThreadingHTTPServer(("", port), CoordinatorHandler)
+    server.coordinator = coordinator
+    return server
+
+
+def post_json(url, payload, timeout=10):
+    import urllib.request
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def execute_render_job(spec, worker, threads):
+    """
+    Runs one coordinator job on this machine and returns (ok, payload). The clip and segment files are
+    written to the shared clip cache, under partial names owned by this worker until they are complete.
+    """
+    renderer = ClipRenderer(
+        spec["video"], spec["clips_dir"], log=lambda message: None, fp_video_path=spec["povs"] or None,
+        pov_layout=spec["pov_layout"], worker=worker, overlay=spec["overlay"]
+    )
+    if spec["kind"] == "preview":
+        result = renderer.render_preview(
+            spec["index"], spec["clip"], spec["stream_start"], bool(spec["fp_start"]), spec["fp_start"], spec["mode"],
+            spec["sprite_frames"], threads, spec["quality"]
+        )
+        payload = {key: result[key] for key in ("clip_path", "thumb_path", "sprite_path", "messages")}
+        return bool(result["clip_path"]), payload
+    segment_path, messages = renderer.render_source_segment(
+        spec["index"], spec["clip"], spec["stream_start"], spec["fp_start"], spec["mode"], spec["cache_key"], threads
+    )
+    return bool(segment_path), {"clip_path": segment_path, "messages": messages}
+
+
+def run_worker(url, name=None, threads=None, log=print, stop=None):
+    """
+    Worker agent: leases jobs from the coordinator at url, renders them and reports back, sending
+    heartbeats while a job runs. Waits for the coordinator to come (back) up, so one agent can serve any
+    number of renders; runs until stop is set.
+    """
+    name = name or f"{platform.node()}-{os.getpid()}"
+    threads = threads or threads_per_job(1)
+    stop = stop or threading.Event()
+    waiting = False
+    while not stop.is_set():
+        try:
+            reply = post_json(url + "/lease", {"worker": name})
+        except (OSError, ValueError):
+            if not waiting:
+                log(f"Waiting for a coordinator at {url}...")
+                waiting = True
+            stop.wait(WORKER_POLL_SECONDS * 5)
+            continue
+        waiting = False
+        job = reply.get("job")
+        if not job:
+            stop.wait(WORKER_POLL_SECONDS)
+            continue
+
+        log(f"Job {job['id'] + 1}: {job['spec']['kind']} {format_timestamp(job['spec']['clip']['start'])}")
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(job["lease_seconds"] / 3):
+                try:
+                    post_json(url + "/heartbeat", {"worker": name, "job": job["id"]})
+                except (OSError, ValueError):
+                    pass
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            ok, payload = execute_render_job(job["spec"], name, threads)
+        except Exception as e:
+            ok, payload = False, {"messages": [f"{name}: {e}"]}
+        finally:
+            done.set()
+        try:
+            post_json(url + "/result", {"worker": name, "job": job["id"], "ok": ok, "payload": payload})
+        except (OSError, ValueError):
+            log(f"Could not report job {job['id'] + 1}, the coordinator will hand it out again.")
+
+
+class ImageLRU:
+    """
+    Bounded cache of decoded images keyed by file path, evicting the least recently used. Widgets keep a
+    reference to the image they show, so an evicted image stays valid until its widget moves on.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key, load):
+        if key in self.items:
+            self.items.move_to_end(key)
+            return self.items[key]
+        value = load()
+        self.items[key] = value
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.items.clear()
+
+
+class ThumbnailStrip:
+    """
+    Horizontally scrolling strip of clip thumbnails that only has widgets for the clips in or near the
+    viewport. Slots are recycled as the strip scrolls and images are loaded on demand through an LRU, so
+    scrolling and filtering cost the same with ten clips or a thousand.
+    """
+    def __init__(self, parent, on_click):
+        self.on_click = on_click
+        self.canvas = tk.Canvas(parent, bg="#1e1e1e", height=STRIP_HEIGHT, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(parent, orient="horizontal", command=self.canvas.xview)
+        self.canvas.configure(xscrollcommand=self.on_xview)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+        self.canvas.pack(side="top", fill="x", expand=True)
+        self.scrollbar.pack(side="bottom", fill="x")
+
+        self.images = ImageLRU(STRIP_IMAGE_CACHE)
+        self.entries = []  # every clip in clip order, filtered or not
+        self.hidden = set()  # clip indexes hidden by the player filter
+        self.shown = []
+        self.slots = {}  # strip position -> slot showing it
+        self.spare_slots = []
+        self.refresh_pending = False
+
+    def clear(self):
+        for slot in list(self.slots.values()) + self.spare_slots:
+            slot["frame"].destroy()
+        self.canvas.delete("all")
+        self.slots = {}
+        self.spare_slots = []
+        self.entries = []
+        self.hidden = set()
+        self.images.clear()
+        self.layout()
+
+    def add(self, i, clip, clip_path, thumb_path, sprite_path=None):
+        entry = {
+            "index": i,
+            "clip_path": clip_path,
+            "title": f"{', '.join(clip['killers'])} → {', '.join(clip['killed_list'])}",
+            "thumb_path": thumb_path,
+            "sprite_path": sprite_path,
+            "selected": True,
+        }
+        # Keep the strip in clip order even though jobs finish out of order
+        position = bisect.bisect([e["index"] for e in self.entries], i)
+        self.entries.insert(position, entry)
+        self.layout()
+
+    def selected(self):
+        """
+        (clip_path, clip index) of every checked clip in clip order, including ones the filter hides.
+        """
+        return [(entry["clip_path"], entry["index"]) for entry in self.entries if entry["selected"]]
+
+    def set_hidden(self, hidden):
+        self.hidden = set(hidden)
+        self.layout()
+
+    def layout(self):
+        self.shown = [entry for entry in self.entries if entry["index"] not in self.hidden]
+        self.canvas.configure(scrollregion=(0, 0, len(self.shown) * STRIP_SLOT_WIDTH, STRIP_HEIGHT))
+        self.schedule_refresh()
+
+    def on_xview(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        # Scroll events come in bursts; rebuild the visible slots once per idle cycle
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def refresh(self):
+        self.refresh_pending = False
+        left = self.canvas.canvasx(0)
+        width = max(self.canvas.winfo_width(), STRIP_SLOT_WIDTH)
+        first = max(0, int(left // STRIP_SLOT_WIDTH) - STRIP_OVERSCAN)
+        last = min(len(self.shown), int((left + width) // STRIP_SLOT_WIDTH) + 1 + STRIP_OVERSCAN)
+
+        for position, slot in list(self.slots.items()):
+            if not first <= position < last or slot["entry"] is not self.shown[position]:
+                del self.slots[position]
+                self.canvas.itemconfigure(slot["window"], state="hidden")
+                self.spare_slots.append(slot)
+        for position in range(first, last):
+            if position not in self.slots:
+                slot = self.spare_slots.pop() if self.spare_slots else self.create_slot()
+                self.fill_slot(slot, self.shown[position], position)
+                self.slots[position] = slot
+        # Only keep enough spare widgets for one more screen of scrolling
+        while len(self.spare_slots) > last - first:
+            self.spare_slots.pop()["frame"].destroy()
+
+    def create_slot(self):
+        frame = ttk.Frame(self.canvas)
+        title = ttk.Label(frame, wraplength=THUMB_WIDTH)
+        title.pack()
+        thumb = ttk.Label(frame)
+        thumb.pack()
+        var = tk.BooleanVar(value=True)
+        slot = {"frame": frame, "title": title, "thumb": thumb, "var": var, "entry": None}
+        check = ttk.Checkbutton(frame, variable=var, command=lambda: slot["entry"].update(selected=var.get()))
+        check.pack()
+
+        thumb.bind("<Button-1>", lambda e: self.on_click(slot["entry"]["clip_path"]))
+        thumb.bind("<Motion>", lambda e: self.scrub(slot, e.x))
+        thumb.bind("<Leave>", lambda e: thumb.config(image=thumb.image))
+        slot["window"] = self.canvas.create_window(
+            0, 0, window=frame, anchor="nw", width=THUMB_WIDTH, height=STRIP_HEIGHT
+        )
+        return slot
+
+    def fill_slot(self, slot, entry, position):
+        from PIL import Image, ImageTk
+        slot["entry"] = entry
+        slot["title"].config(text=entry["title"])
+        # Thumbnails are written at strip size, no resize needed
+        image = self.images.get(entry["thumb_path"], lambda: ImageTk.PhotoImage(Image.open(entry["thumb_path"])))
+        slot["thumb"].config(image=image)
+        slot["thumb"].image = image
+        slot["var"].set(entry["selected"])
+        self.canvas.coords(slot["window"], position * STRIP_SLOT_WIDTH + 5, 0)
+        self.canvas.itemconfigure(slot["window"], state="normal")
+
+    def load_sprite(self, sprite_path):
+        from PIL import Image, ImageTk
+        sheet = Image.open(sprite_path)
+        frame_count = max(1, sheet.width // THUMB_WIDTH)
+        return [
+            ImageTk.PhotoImage(sheet.crop((k * THUMB_WIDTH, 0, (k + 1) * THUMB_WIDTH, THUMB_HEIGHT)))
+            for k in range(frame_count)
+        ]
+
+    def scrub(self, slot, x):
+        # Hover sprites are only decoded once the pointer is over the clip
+        sprite_path = slot["entry"]["sprite_path"]
+        if not sprite_path:
+            return
+        frames = self.images.get(sprite_path, lambda: self.load_sprite(sprite_path))
+        k = min(len(frames) - 1, max(0, x * len(frames) // max(1, slot["thumb"].winfo_width())))
+        slot["thumb"].frames = frames
+        slot["thumb"].config(image=frames[k])
+
+
 class ClipExtractorApp:
     def __init__(self, root):
         self.root = root
@@ -29,14 +3112,21 @@ class ClipExtractorApp:
         self.intro_path = None
         self.outro_path = None
 
-        self.events = []
-        self.clip_checks = []
+        self.kill_log = None
+        self.kill_log_identity = None
+        self.clips_log = None
+        self.clip_of_event = None
+        self.live_session = None
         self.clip_paths = []
+        self.clip_images = []
         self.event_metadata = []
         self.player_filters = {}
-        self.unique_players = set()
+        self.ui_events = queue.Queue()
 
-        os.makedirs("clips", exist_ok=True)
+        os.makedirs(CLIPS_DIR, exist_ok=True)
+        self.renderer = None
+        self.merged_clips = []
+        self.root.after(UI_POLL_MS, self.drain_ui_events)
 
         style = ttk.Style()
         style.theme_use('default')
@@ -77,9 +3167,27 @@ class ClipExtractorApp:
         self.fp_video_btn = ttk.Button(self.fp_options_frame, text="Select First Person Video", command=self.load_fp_video)
         self.fp_video_btn.pack(pady=5)
 
-        ttk.Label(self.fp_options_frame, text="Time of First Kill in FP Video (hh:mm:ss):").pack()
+        ttk.Label(self.fp_options_frame, text="Time of First Kill in FP Video (hh:mm:ss[.mmm]):").pack()
         self.fp_start_time_entry = ttk.Entry(self.fp_options_frame, width=20)
         self.fp_start_time_entry.pack(pady=5)
+        self.sync_btn = ttk.Button(self.fp_options_frame, text="Auto Sync From Audio", command=self.run_audio_sync)
+        self.sync_btn.pack(pady=5)
+
+        # More POVs (e.g. the rest of the squad), each with its own first kill time
+        self.extra_povs = []
+        self.add_pov_btn = ttk.Button(self.fp_options_frame, text="Add Another POV...", command=self.add_pov_row)
+        self.add_pov_btn.pack(pady=5)
+
+        ttk.Label(self.fp_options_frame, text="POV Layout:").pack()
+        self.pov_layout = tk.StringVar(value="Side by side")
+        self.pov_layout_box = ttk.Combobox(
+            self.fp_options_frame,
+            textvariable=self.pov_layout,
+            values=list(POV_LAYOUTS),
+            state="readonly",
+            width=20
+        )
+        self.pov_layout_box.pack(pady=5)
 
         addon_frame = ttk.LabelFrame(top_frame, text="Optional Addon Videos", padding=10)
         addon_frame.grid(row=0, column=1, padx=10)
@@ -92,18 +3200,23 @@ class ClipExtractorApp:
         self.outro_btn = ttk.Button(addon_frame, text="Select Outro Video", command=self.load_outro)
         self.outro_btn.pack(pady=5)
 
-        ttk.Label(root, text="Time of First Kill (hh:mm:ss):").pack()
-        ttk.Label(root, text="This needs to be accurate to the second, find the time when 'first blood' is said").pack()
+        ttk.Label(root, text="Time of First Kill (hh:mm:ss[.mmm]):").pack()
+        ttk.Label(root, text="The moment 'first blood' is said, to the millisecond if you can, or let the button below find it").pack()
         ttk.Label(root, text="ALL the time calculations depend on this value.").pack()
         self.start_time_entry = ttk.Entry(root, width=20)
         self.start_time_entry.pack(pady=5)
+        self.first_blood_btn = ttk.Button(root, text="Find From 'First Blood' Sample...", command=self.run_first_blood_search)
+        self.first_blood_btn.pack(pady=5)
 
         settings_frame = ttk.LabelFrame(top_frame, text="Edit Settings", padding=10)
         settings_frame.grid(row=0, column=2, padx=10)
 
-        self.distance_threshold = tk.DoubleVar(value=50.0)
-        self.time_before = tk.IntVar(value=5)
-        self.time_after = tk.IntVar(value=3)
+        self.distance_threshold = tk.DoubleVar(value=DEFAULT_SETTINGS["distance_threshold"])
+        self.time_before = tk.IntVar(value=DEFAULT_SETTINGS["time_before"])
+        self.time_after = tk.IntVar(value=DEFAULT_SETTINGS["time_after"])
+        self.parallel_jobs = tk.IntVar(value=DEFAULT_SETTINGS["parallel_jobs"])
+        self.sprite_frames = tk.IntVar(value=DEFAULT_SETTINGS["sprite_frames"])
+        self.cache_budget_gb = tk.IntVar(value=DEFAULT_SETTINGS["cache_budget_gb"])
 
         self.distance_label = ttk.Label(settings_frame, text=f"Camera Distance Threshold: {self.distance_threshold.get():.1f}")
         self.distance_label.pack()
@@ -123,6 +3236,52 @@ class ClipExtractorApp:
                   variable=self.time_after, length=200, command=self.update_after_label)
         after_slider.pack()
 
+        self.jobs_label = ttk.Label(settings_frame, text=f"Parallel Jobs: {self.parallel_jobs.get()}")
+        self.jobs_label.pack()
+        jobs_slider = ttk.Scale(settings_frame, from_=1, to=max(1, os.cpu_count() or 1), orient=tk.HORIZONTAL,
+                  variable=self.parallel_jobs, length=200, command=self.update_jobs_label)
+        jobs_slider.pack()
+
+        self.sprite_label = ttk.Label(settings_frame, text=f"Hover Preview Frames: {self.sprite_frames.get()}")
+        self.sprite_label.pack()
+        sprite_slider = ttk.Scale(settings_frame, from_=0, to=12, orient=tk.HORIZONTAL,
+                  variable=self.sprite_frames, length=200, command=self.update_sprite_label)
+        sprite_slider.pack()
+
+        self.cache_label = ttk.Label(settings_frame, text=f"Clip Cache Budget (GB): {self.cache_budget_gb.get()}")
+        self.cache_label.pack()
+        cache_slider = ttk.Scale(settings_frame, from_=1, to=200, orient=tk.HORIZONTAL,
+                  variable=self.cache_budget_gb, length=200, command=self.update_cache_label)
+        cache_slider.pack()
+
+        self.distributed_var = tk.BooleanVar(value=bool(DEFAULT_SETTINGS["distributed_port"]))
+        ttk.Checkbutton(
+            settings_frame,
+            text=f"Share rendering with worker agents (port {COORDINATOR_PORT})",
+            variable=self.distributed_var
+        ).pack(pady=5)
+
+        self.energy_trim_var = tk.BooleanVar(value=DEFAULT_SETTINGS["energy_trim"])
+        ttk.Checkbutton(
+            settings_frame,
+            text="Trim clips to the action (audio)",
+            variable=self.energy_trim_var
+        ).pack(pady=5)
+
+        self.top_clips = tk.IntVar(value=DEFAULT_SETTINGS["energy_top_n"])
+        self.top_clips_label = ttk.Label(settings_frame, text="Keep Loudest Clips: all")
+        self.top_clips_label.pack()
+        top_clips_slider = ttk.Scale(settings_frame, from_=0, to=50, orient=tk.HORIZONTAL,
+                  variable=self.top_clips, length=200, command=self.update_top_clips_label)
+        top_clips_slider.pack()
+
+        self.reel_minutes = tk.IntVar(value=DEFAULT_SETTINGS["target_reel_seconds"] // 60)
+        self.reel_minutes_label = ttk.Label(settings_frame, text="Target Reel Length (minutes): no limit")
+        self.reel_minutes_label.pack()
+        reel_minutes_slider = ttk.Scale(settings_frame, from_=0, to=30, orient=tk.HORIZONTAL,
+                  variable=self.reel_minutes, length=200, command=self.update_reel_minutes_label)
+        reel_minutes_slider.pack()
+
         # Move the combine_fp_var and checkbox into settings_frame
         self.combine_fp_var = tk.BooleanVar(value=False)
         self.combine_fp_chk = ttk.Checkbutton(
@@ -136,7 +3295,7 @@ class ClipExtractorApp:
 
         self.fp_video_path = None
 
-        self.visible_to_caster_var = tk.BooleanVar(value=True)
+        self.visible_to_caster_var = tk.BooleanVar(value=DEFAULT_SETTINGS["visible_to_caster"])
         self.visible_to_caster_chk = ttk.Checkbutton(
             settings_frame,
             text="kills visible to caster",
@@ -144,6 +3303,55 @@ class ClipExtractorApp:
         )
         self.visible_to_caster_chk.pack(pady=5)
 
+        ttk.Label(settings_frame, text="Preview Extraction Mode:").pack()
+        self.extraction_mode = tk.StringVar(value="Re-encode")
+        self.extraction_mode_box = ttk.Combobox(
+            settings_frame,
+            textvariable=self.extraction_mode,
+            values=list(EXTRACTION_MODES),
+            state="readonly",
+            width=26
+        )
+        self.extraction_mode_box.pack(pady=5)
+
+        ttk.Label(settings_frame, text="Preview Quality:").pack()
+        self.preview_quality = tk.StringVar(value="Full quality")
+        self.preview_quality_box = ttk.Combobox(
+            settings_frame,
+            textvariable=self.preview_quality,
+            values=list(PREVIEW_QUALITIES),
+            state="readonly",
+            width=32
+        )
+        self.preview_quality_box.pack(pady=5)
+
+        ttk.Label(settings_frame, text="Extra Outputs:").pack()
+        self.output_profile_vars = {}
+        for name, profile in OUTPUT_PROFILES.items():
+            var = tk.BooleanVar(value=name in DEFAULT_SETTINGS["output_profiles"])
+            ttk.Checkbutton(settings_frame, text=profile["label"], variable=var).pack(anchor="w")
+            self.output_profile_vars[name] = var
+
+        self.kill_feed_var = tk.BooleanVar(value=DEFAULT_SETTINGS["kill_feed"])
+        ttk.Checkbutton(settings_frame, text="Burn in kill feed", variable=self.kill_feed_var).pack(pady=5)
+        ttk.Label(settings_frame, text="Kill Feed Text ({killer}, {victim}):").pack()
+        self.kill_feed_template_entry = ttk.Entry(settings_frame, width=32)
+        self.kill_feed_template_entry.insert(0, DEFAULT_SETTINGS["kill_feed_template"])
+        self.kill_feed_template_entry.pack(pady=2)
+        ttk.Label(settings_frame, text="Name Card Text ({killers}, {victims}, {kills}):").pack()
+        self.name_card_template_entry = ttk.Entry(settings_frame, width=32)
+        self.name_card_template_entry.insert(0, DEFAULT_SETTINGS["name_card_template"])
+        self.name_card_template_entry.pack(pady=2)
+        self.kill_feed_position = tk.StringVar(value="Top right")
+        self.kill_feed_position_box = ttk.Combobox(
+            settings_frame,
+            textvariable=self.kill_feed_position,
+            values=list(KILL_FEED_POSITIONS),
+            state="readonly",
+            width=32
+        )
+        self.kill_feed_position_box.pack(pady=5)
+
         self.filter_frame = ttk.LabelFrame(top_frame, text="Filter by Player", padding=10)
         self.filter_frame.grid(row=1, column=0, columnspan=3, pady=10, sticky="ew")
 
@@ -158,8 +3366,16 @@ class ClipExtractorApp:
         self.final_btn = ttk.Button(button_frame, text="Create Final Edited Video", command=self.run_final_thread, state="disabled")
         self.final_btn.grid(row=0, column=1, padx=10)
 
+        self.live_btn = ttk.Button(button_frame, text="Start Live Mode", command=self.toggle_live_mode)
+        self.live_btn.grid(row=0, column=2, padx=10)
+
+        self.session_btn = ttk.Button(button_frame, text="Render Each Match", command=self.run_session_thread)
+        self.session_btn.grid(row=0, column=3, padx=10)
+
         self.progress = ttk.Progressbar(root, orient="horizontal", length=400, mode="determinate")
         self.progress.pack(pady=5)
+        self.progress_label = ttk.Label(root, text="")
+        self.progress_label.pack()
 
         ttk.Separator(root, orient="horizontal").pack(fill="x", pady=10)
 
@@ -170,22 +3386,21 @@ class ClipExtractorApp:
         self.thumbnail_frame = tk.Frame(root, bg="#1e1e1e")
         self.thumbnail_frame.pack(fill='x', expand=True)
 
-        self.canvas = tk.Canvas(self.thumbnail_frame, bg="#1e1e1e", height=150)
-        self.scrollbar = ttk.Scrollbar(self.thumbnail_frame, orient="horizontal", command=self.canvas.xview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
-        )
+        self.strip = ThumbnailStrip(self.thumbnail_frame, self.preview_clip)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(xscrollcommand=self.scrollbar.set)
+        # Probing for ffmpeg would hold up the first paint, do it once the window is showing
+        self.tools = None
+        self.root.after_idle(lambda: threading.Thread(target=self.check_tools, daemon=True).start())
 
-        self.canvas.pack(side="top", fill="x", expand=True)
-        self.scrollbar.pack(side="bottom", fill="x")
+    def check_tools(self):
+        self.tools = find_tools()
+        missing = [tool for tool, version in self.tools.items() if not version]
+        if missing:
+            self.log(f"Could not run {' or '.join(missing)}; install FFmpeg and make sure it is on the PATH.")
+            self.in_ui(
+                messagebox.showerror, "FFmpeg not found",
+                f"{' and '.join(missing)} could not be found. Clips can't be extracted until FFmpeg is installed."
+            )
 
     def update_distance_label(self, e):
         self.distance_label.config(text=f"Camera Distance Threshold: {self.distance_threshold.get():.1f}")
@@ -196,10 +3411,67 @@ class ClipExtractorApp:
     def update_after_label(self, e):
         self.after_label.config(text=f"Time After Kill (seconds): {int(self.time_after.get())}")
 
+    def update_jobs_label(self, e):
+        self.jobs_label.config(text=f"Parallel Jobs: {int(self.parallel_jobs.get())}")
+
+    def update_sprite_label(self, e):
+        self.sprite_label.config(text=f"Hover Preview Frames: {int(self.sprite_frames.get())}")
+
+    def update_cache_label(self, e):
+        self.cache_label.config(text=f"Clip Cache Budget (GB): {int(self.cache_budget_gb.get())}")
+
+    def update_top_clips_label(self, e):
+        count = int(self.top_clips.get())
+        self.top_clips_label.config(text=f"Keep Loudest Clips: {count or 'all'}")
+
+    def update_reel_minutes_label(self, e):
+        minutes = int(self.reel_minutes.get())
+        self.reel_minutes_label.config(text=f"Target Reel Length (minutes): {minutes or 'no limit'}")
+
     def log(self, message):
-        self.console_output.insert(tk.END, message + "\n")
-        self.console_output.see(tk.END)
-        self.root.update()
+        # Safe from any thread: the line is shown on the next drain of the UI queue
+        self.ui_events.put(("log", message))
+
+    def in_ui(self, func, *args):
+        """
+        Runs func(*args) on the Tk thread. Workers use this for anything that touches a widget.
+        """
+        self.ui_events.put(("call", (func, args)))
+
+    def drain_ui_events(self):
+        """
+        Applies the queued worker events in one batch: log lines go in with a single insert and only the
+        latest progress is drawn. Reschedules itself on the Tk loop.
+        """
+        try:
+            lines = []
+            progress = None
+            for _ in range(UI_EVENTS_PER_TICK):
+                try:
+                    kind, payload = self.ui_events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "log":
+                    lines.append(payload)
+                elif kind == "progress":
+                    progress = payload
+                elif kind == "call":
+                    func, args = payload
+                    try:
+                        func(*args)
+                    except Exception as e:
+                        # One bad update (e.g. a truncated thumbnail) mustn't stop the ones after it
+                        lines.append(f"UI update failed: {e}")
+            if lines:
+                self.console_output.insert(tk.END, "\n".join(lines) + "\n")
+                self.console_output.see(tk.END)
+            if progress:
+                value, text = progress
+                self.progress['value'] = value
+                if text is not None:
+                    self.progress_label.config(text=text)
+        finally:
+            self.root.after(UI_POLL_MS, self.drain_ui_events)
 
     def load_video(self):
         self.video_path = filedialog.askopenfilename(filetypes=[("Video files", "*.mp4 *.mkv")])
@@ -213,16 +3485,7 @@ class ClipExtractorApp:
             self.log_btn.config(text=os.path.basename(self.log_path))
             self.log(f"Log file selected: {self.log_path}")
 
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                self.events = [json.loads(line) for line in f if line.strip()]
-
-            # Extract unique players
-            self.unique_players.clear()
-            for event in self.events:
-                if "Killer" in event:
-                    self.unique_players.add(event["Killer"])
-                if "Killed" in event:
-                    self.unique_players.add(event["Killed"])
+            self.parse_log()
 
             for widget in self.filter_frame.winfo_children():
                 widget.destroy()
@@ -232,10 +3495,10 @@ class ClipExtractorApp:
             row_num = 0
             col_num = 0
 
-            sorted_players = sorted(self.unique_players)
+            sorted_players = sorted(self.kill_log.players)
             for i, player in enumerate(sorted_players):
                 var = tk.BooleanVar(value=True)
-                chk = ttk.Checkbutton(self.filter_frame, text=player, variable=var)
+                chk = ttk.Checkbutton(self.filter_frame, text=player, variable=var, command=self.apply_filters)
                 chk.grid(row=row_num, column=col_num, sticky="w", padx=5, pady=2)
                 self.filter_vars[player] = var
 
@@ -270,378 +3533,947 @@ class ClipExtractorApp:
             self.fp_video_btn.config(text=os.path.basename(self.fp_video_path))
             self.log(f"First person video selected: {self.fp_video_path}")
 
+    def add_pov_row(self):
+        path = filedialog.askopenfilename(filetypes=[("Video files", "*.mp4 *.mkv")])
+        if not path:
+            return
+        row = ttk.Frame(self.fp_options_frame)
+        row.pack(pady=2, before=self.add_pov_btn)
+        ttk.Label(row, text=os.path.basename(path)).pack(side="left")
+        entry = ttk.Entry(row, width=14)
+        entry.pack(side="left", padx=5)
+        pov = {"path": path, "entry": entry, "frame": row}
+        ttk.Button(row, text="Remove", command=lambda: self.remove_pov_row(pov)).pack(side="left")
+        self.extra_povs.append(pov)
+        self.log(f"Extra POV video selected: {path}")
+
+    def remove_pov_row(self, pov):
+        pov["frame"].destroy()
+        self.extra_povs.remove(pov)
+
+    def selected_povs(self):
+        """
+        Returns ([paths], [first kill times]) for every POV that has both set, or ([], []) when the POVs
+        aren't being combined. The first one is the main first person video.
+        """
+        if not self.combine_fp_var.get():
+            return [], []
+        povs = [(self.fp_video_path, self.fp_start_time_entry)] + [(pov["path"], pov["entry"]) for pov in self.extra_povs]
+        povs = [(path, entry.get().strip()) for path, entry in povs if path and entry.get().strip()]
+        return [path for path, first_kill in povs], [first_kill for path, first_kill in povs]
+
+    def run_first_blood_search(self):
+        if not self.video_path:
+            messagebox.showerror("Error", "Please select a video first.")
+            return
+        sample_path = filedialog.askopenfilename(filetypes=[("Audio or video files", "*.wav *.mp3 *.ogg *.flac *.mp4 *.mkv")])
+        if not sample_path:
+            return
+        self.first_blood_btn.config(state="disabled")
+        thread = threading.Thread(target=self.find_first_blood, args=(self.video_path, sample_path))
+        thread.start()
+
+    def find_first_blood(self, video_path, sample_path):
+        self.log(f"Searching the stream audio for {os.path.basename(sample_path)}...")
+        try:
+            position, score = find_reference_sound(video_path, sample_path)
+            if position is None:
+                self.log("Could not read audio from the stream or the sample.")
+            else:
+                self.log(f"Reference sound found at {format_timestamp(position)} (match {score:.2f}).")
+                self.in_ui(self.set_entry, self.start_time_entry, format_timestamp(position))
+        except Exception as e:
+            self.log(f"Error during audio search: {e}")
+        finally:
+            self.in_ui(self.first_blood_btn.config, {"state": "normal"})
+
+    def run_audio_sync(self):
+        if not self.video_path or not (self.fp_video_path or self.extra_povs):
+            messagebox.showerror("Error", "Please select both the stream and a first person video.")
+            return
+        try:
+            stream_first_kill = parse_hms(self.start_time_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Enter the stream's first kill time before syncing.")
+            return
+        povs = [(self.fp_video_path, self.fp_start_time_entry)] if self.fp_video_path else []
+        povs += [(pov["path"], pov["entry"]) for pov in self.extra_povs]
+        jobs = []
+        for path, entry in povs:
+            try:
+                fp_hint = parse_hms(entry.get())
+            except ValueError:
+                fp_hint = None
+            jobs.append((path, entry, fp_hint))
+        self.sync_btn.config(state="disabled")
+        thread = threading.Thread(target=self.sync_fp_audio, args=(self.video_path, jobs, stream_first_kill))
+        thread.start()
+
+    def sync_fp_audio(self, video_path, jobs, stream_first_kill):
+        try:
+            for fp_video_path, entry, fp_hint in jobs:
+                self.log(f"Matching {os.path.basename(fp_video_path)} audio against the stream...")
+                offset, score = find_fp_offset(
+                    video_path, fp_video_path, stream_first_kill if fp_hint is not None else None, fp_hint
+                )
+                if offset is None:
+                    self.log("Could not read audio from one of the videos.")
+                    continue
+                self.log(f"{os.path.basename(fp_video_path)} is offset by {offset:+.3f}s from the stream (match {score:.2f}).")
+                self.in_ui(self.set_entry, entry, format_timestamp(max(stream_first_kill + offset, 0.0)))
+        except Exception as e:
+            self.log(f"Error during audio sync: {e}")
+        finally:
+            self.in_ui(self.sync_btn.config, {"state": "normal"})
+
+    def set_entry(self, entry, text):
+        entry.delete(0, tk.END)
+        entry.insert(0, text)
+
     def parse_log(self):
-        with open(self.log_path, "r", encoding="utf-8") as f:
-            self.events = [json.loads(line) for line in f if line.strip()]
+        # load_log already parsed the file; only read it again if it changed on disk since
+        identity = source_identity(self.log_path)
+        if self.kill_log is None or identity != self.kill_log_identity:
+            self.kill_log = KillLog.from_file(self.log_path)
+            self.kill_log_identity = identity
+
+    def collect_settings(self):
+        return {
+            "distance_threshold": self.distance_threshold.get(),
+            "time_before": int(self.time_before.get()),
+            "time_after": int(self.time_after.get()),
+            "visible_to_caster": self.visible_to_caster_var.get(),
+            "players": [player for player, var in self.filter_vars.items() if var.get()],
+            "parallel_jobs": max(1, int(self.parallel_jobs.get())),
+            "extraction_mode": EXTRACTION_MODES.get(self.extraction_mode.get(), "reencode"),
+            "preview_quality": PREVIEW_QUALITIES.get(self.preview_quality.get(), "full"),
+            "pov_layout": POV_LAYOUTS.get(self.pov_layout.get(), "side_by_side"),
+            "sprite_frames": int(self.sprite_frames.get()),
+            "cache_budget_gb": int(self.cache_budget_gb.get()),
+            "output_profiles": [name for name, var in self.output_profile_vars.items() if var.get()],
+            "energy_trim": self.energy_trim_var.get(),
+            "energy_top_n": int(self.top_clips.get()),
+            "target_reel_seconds": int(self.reel_minutes.get()) * 60,
+            "distributed_port": COORDINATOR_PORT if self.distributed_var.get() else 0,
+            "kill_feed": self.kill_feed_var.get(),
+            "kill_feed_template": self.kill_feed_template_entry.get(),
+            "name_card_template": self.name_card_template_entry.get(),
+            "kill_feed_position": KILL_FEED_POSITIONS.get(self.kill_feed_position.get(), "top_right"),
+        }
 
     def run_processing_thread(self):
+        if not self.video_path or not self.log_path:
+            messagebox.showerror("Error", "Please select both a video and a log file.")
+            return
         self.process_btn.config(state="disabled")
         self.final_btn.config(state="disabled")
-        thread = threading.Thread(target=self.process)
+
+        self.console_output.delete(1.0, tk.END)
+        self.progress['value'] = 0
+        self.strip.clear()
+        self.clip_paths.clear()
+        self.clip_images.clear()
+
+        # Widgets and Tk variables are read here, the worker only gets plain values
+        pov_paths, pov_times = self.selected_povs()
+        thread = threading.Thread(
+            target=self.process,
+            args=(self.collect_settings(), self.start_time_entry.get(), pov_times or None, pov_paths)
+        )
         thread.start()
 
+    def run_session_thread(self):
+        if not self.video_path or not self.log_path:
+            messagebox.showerror("Error", "Please select both a video and a log file.")
+            return
+        try:
+            parse_hms(self.start_time_entry.get())
+            kill_feed_style(self.collect_settings())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        settings = self.collect_settings()
+        # The player list is only filled in once a log has been processed
+        if all(var.get() for var in self.filter_vars.values()):
+            settings["players"] = None
+        name = Path(self.video_path).stem
+        job = {
+            "name": name, "video": self.video_path, "log": self.log_path, "first_kill": self.start_time_entry.get(),
+            "output_dir": os.path.join("session_output", name), "intro": self.intro_path, "outro": self.outro_path,
+            "settings": settings,
+        }
+        pov_paths, pov_times = self.selected_povs()
+        if pov_times:
+            job["fp_video"] = pov_paths
+            job["fp_first_kill"] = pov_times
+        self.session_btn.config(state="disabled")
+        self.console_output.delete(1.0, tk.END)
+        threading.Thread(target=self.render_session, args=(job,)).start()
+
+    def render_session(self, job):
+        """
+        Renders a reel per match of the session log, several matches at once, without clip selection.
+        """
+        try:
+            jobs = session_jobs(job, self.log)
+            processes = max(1, min(len(jobs), default_parallel_jobs()))
+            if job["settings"]["distributed_port"]:
+                # One match at a time, so each one's coordinator gets the port and the workers
+                processes = 1
+            for match_job in jobs:
+                match_job["settings"] = dict(
+                    match_job["settings"], parallel_jobs=max(1, int(job["settings"]["parallel_jobs"]) // processes)
+                )
+            self.log(f"Rendering {len(jobs)} match reels, {processes} at a time...")
+            summaries = run_jobs(jobs, processes, self.log)
+            succeeded = sum(1 for summary in summaries if summary["status"] == "ok")
+            self.log(f"{succeeded} of {len(jobs)} match reels written to {os.path.abspath(job['output_dir'])} "
+                     f"(see session_summary.json).")
+        except Exception as e:
+            self.log(f"Error while rendering the session: {e}")
+        finally:
+            self.in_ui(self.session_btn.config, {"state": "normal"})
+
     def run_final_thread(self):
         self.process_btn.config(state="disabled")
         self.final_btn.config(state="disabled")
 
-        selected_paths = [
-            path for chk_var, path, killer, killed, frame in self.clip_checks if chk_var
-        ]
+        selected_paths = [path for path, idx in self.strip.selected()]
         if not selected_paths:
             messagebox.showwarning("No Clips Selected", "Please select at least one clip.")
             self.process_btn.config(state="normal")
             self.final_btn.config(state="normal")
             return
         print(str(selected_paths))
+        selected = [(path, self.merged_clips[idx]) for path, idx in self.strip.selected()]
+        pov_paths, pov_times = self.selected_povs()
         thread = threading.Thread(
             target=self.create_final_video,
-            args=(selected_paths,)
+            args=(selected, self.start_time_entry.get(), pov_times or None, self.collect_settings())
         )
         thread.start()
 
-    def create_side_by_side_clip(self, stream_path, fp_path, stream_start, duration, fp_start):
-        """
-        Returns a moviepy VideoClip with stream and first-person video side by side, both with audio.
-        """
-        stream_clip = VideoFileClip(stream_path).subclip(stream_start, stream_start + duration)
-        fp_clip = VideoFileClip(fp_path).subclip(fp_start, fp_start + duration)
+    def preview_clip(self, clip_path):
+        subprocess.Popen(["ffplay", "-autoexit", clip_path])
+
+    def process(self, settings, start_time_str, fp_start_time, pov_paths=None):
+        # Runs on a worker thread: widgets are only touched through log, show_progress and in_ui
+        try:
+            self.render_clip_previews(settings, start_time_str, fp_start_time, pov_paths)
+        except Exception as e:
+            self.log(f"Error while generating previews: {e}")
+        finally:
+            self.in_ui(self.final_btn.config, {"state": "normal" if self.clip_paths else "disabled"})
+            self.in_ui(self.process_btn.config, {"state": "normal"})
+
+    def render_clip_previews(self, settings, start_time_str, fp_start_time, pov_paths):
+        timer = StageTimer()
+        self.log("Parsing log file...")
+        with timer.stage("log_parse"):
+            self.parse_log()
+
+        self.log("Filtering events...")
+        try:
+            with timer.stage("filtering"):
+                merged_clips = build_clip_list(self.kill_log, start_time_str, settings)
+            overlay = kill_feed_style(settings)
+        except ValueError as e:
+            self.in_ui(messagebox.showerror, "Error", str(e))
+            return
 
-        # Resize to same height
-        min_height = min(stream_clip.h, fp_clip.h)
-        stream_clip = stream_clip.resize(height=min_height)
-        fp_clip = fp_clip.resize(height=min_height)
+        if not merged_clips:
+            self.log("No events matched the filtering criteria.")
+            return
 
-        # Compose side by side
-        from moviepy.editor import clips_array, CompositeAudioClip
+        self.renderer = ClipRenderer(
+            self.video_path, CLIPS_DIR, self.log,
+            fp_video_path=pov_paths if fp_start_time else None,
+            cache_budget_gb=settings["cache_budget_gb"], on_progress=self.show_progress, timer=timer,
+            pov_layout=settings["pov_layout"], overlay=overlay
+        )
+        merged_clips = self.renderer.analyze_clips(merged_clips, self.kill_log, start_time_str, settings)
 
-        # Combine audio (both tracks)
-        combined_audio = CompositeAudioClip([stream_clip.audio, fp_clip.audio])
+        self.merged_clips = merged_clips
+        self.clip_times = [(clip["start"], clip["end"]) for clip in merged_clips]
+        self.index_clip_events(self.kill_log, merged_clips)
 
-        side_by_side = clips_array([[stream_clip, fp_clip]])
-        side_by_side = side_by_side.set_audio(combined_audio)
+        self.renderer.render_previews(
+            merged_clips, start_time_str, fp_start_time, settings, self.collect_preview_result
+        )
 
-        return side_by_side
+        # Keep this session's clips and images, trim older entries down to the budget
+        freed = self.renderer.clip_cache.evict(keep=self.clip_paths + self.clip_images)
+        if freed:
+            self.log(f"Evicted {freed / 1024 ** 2:.0f} MB of old clips from the cache.")
 
-    def generate_thumbnail(self, clip_path, thumb_path):
-        cmd = [
-            "ffmpeg", "-y", "-i", clip_path, "-ss", "00:00:01.000", "-vframes", "1", thumb_path
-        ]
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if proc.returncode != 0:
-            self.log(f"Failed to generate thumbnail for {clip_path}")
-            self.log(proc.stderr.decode())
-            return False
-        return True
+        self.log("Clip preview generation complete.")
+        timer.report(self.log, os.path.join(CLIPS_DIR, "preview_timings.json"))
 
-    def preview_clip(self, clip_path):
-        subprocess.Popen(["ffplay", "-autoexit", clip_path])
+    def index_clip_events(self, kill_log, clips):
+        # Event -> merged clip lookup, so player filter changes only touch numpy arrays
+        import numpy as np
+        self.clips_log = kill_log
+        self.clip_of_event = np.full(len(kill_log), -1, dtype=np.int64)
+        if not clips:
+            return
+        event_ids = np.concatenate([np.asarray(clip["event_ids"], dtype=np.int64) for clip in clips])
+        clip_ids = np.repeat(np.arange(len(clips)), [len(clip["event_ids"]) for clip in clips])
+        self.clip_of_event[event_ids] = clip_ids
+
+    def toggle_live_mode(self):
+        if self.live_session:
+            self.live_btn.config(state="disabled")
+            self.log("Stopping live mode, finishing the last clip...")
+            self.live_session.stop()
+            return
+
+        if not self.video_path or not self.log_path:
+            messagebox.showerror("Error", "Please select both a video and a log file.")
+            return
+        try:
+            parse_hms(self.start_time_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid time format. Use hh:mm:ss or hh:mm:ss.mmm.")
+            return
+        try:
+            overlay = kill_feed_style(self.collect_settings())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if not self.video_path.lower().endswith(".mkv"):
+            self.log("Warning: a growing MP4 can't be read until recording stops, record to MKV for live mode.")
 
-    def process(self):
         self.console_output.delete(1.0, tk.END)
         self.progress['value'] = 0
-        self.clip_checks.clear()
+        self.strip.clear()
         self.clip_paths.clear()
+        self.clip_images.clear()
 
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        settings = self.collect_settings()
+        # New players keep showing up while the match runs, so only filter if the user unchecked someone
+        if all(var.get() for var in self.filter_vars.values()):
+            settings["players"] = None
 
-        if not self.video_path or not self.log_path:
-            messagebox.showerror("Error", "Please select both a video and a log file.")
-            self.process_btn.config(state="normal")
-            return
+        pov_paths, pov_times = self.selected_povs()
+        self.renderer = ClipRenderer(
+            self.video_path, CLIPS_DIR, self.log, fp_video_path=pov_paths or None,
+            cache_budget_gb=settings["cache_budget_gb"], on_progress=self.show_progress,
+            pov_layout=settings["pov_layout"], overlay=overlay
+        )
+        self.live_session = LiveSession(
+            self.renderer, self.log_path, self.start_time_entry.get(), pov_times or None,
+            settings, self.collect_live_result, self.log
+        )
+        self.merged_clips = self.live_session.clips
 
-        self.log("Parsing log file...")
-        self.parse_log()
+        self.process_btn.config(state="disabled")
+        self.final_btn.config(state="disabled")
+        self.live_btn.config(text="Stop Live Mode")
+        thread = threading.Thread(target=self.run_live_session)
+        thread.start()
 
-        start_time_str = self.start_time_entry.get()
+    def run_live_session(self):
         try:
-            start_time = datetime.strptime(start_time_str, "%H:%M:%S")
-        except ValueError:
-            messagebox.showerror("Error", "Invalid time format. Use hh:mm:ss.")
-            self.process_btn.config(state="normal")
-            return
+            self.live_session.run()
+        except Exception as e:
+            self.log(f"Live mode stopped by an error: {e}")
+        finally:
+            self.live_session = None
+            self.in_ui(self.live_btn.config, {"text": "Start Live Mode", "state": "normal"})
+            self.in_ui(self.process_btn.config, {"state": "normal"})
+            if self.clip_paths:
+                self.in_ui(self.final_btn.config, {"state": "normal"})
 
-        if not self.events:
-            messagebox.showerror("Error", "No events found in log file.")
-            self.process_btn.config(state="normal")
-            return
+    def collect_live_result(self, result, completed, total):
+        self.index_clip_events(self.live_session.kill_log, self.live_session.clips)
+        self.collect_preview_result(result, completed, total)
+        # Live clips are cut one at a time, so the bar counts finished clips
+        self.ui_events.put(("progress", (completed / total * 100, None)))
 
-        first_kill_event = next((e for e in self.events), None)
-        if not first_kill_event:
-            messagebox.showerror("Error", "No valid kill events found in log file.")
-            self.process_btn.config(state="normal")
-            return
+    def collect_preview_result(self, result, completed, total):
+        # Called on worker threads; the thumbnail widget is built by the Tk loop
+        for message in result["messages"]:
+            self.log(message)
 
-        first_kill_time_log = datetime.fromisoformat(first_kill_event["TimeStamp"].replace("Z", "+00:00"))
+        if result["clip_path"]:
+            self.clip_paths.append(result["clip_path"])
+            self.clip_images += [result["thumb_path"], result["sprite_path"]]
+            if result["thumb_path"]:
+                self.in_ui(
+                    self.strip.add,
+                    result["index"], result["clip"], result["clip_path"], result["thumb_path"], result["sprite_path"]
+                )
 
-        self.log("Filtering events...")
-        filtered_events = []
-        selected_players = [player for player, var in self.filter_vars.items() if var.get()]
-        for event in self.events:
-            visible_ok = True
-            if self.visible_to_caster_var.get():
-                visible_ok = event.get("KillerInView") and event.get("InView")
-            if (
-                visible_ok and
-                event.get("CameraDistance", 9999) <= self.distance_threshold.get()
-            ):
-                killer = event.get("Killer", "Unknown")
-                killed = event.get("Killed", "Unknown")
-                event_time_log = datetime.fromisoformat(event["TimeStamp"].replace("Z", "+00:00"))
-                delta = event_time_log - first_kill_time_log
-                actual_time = start_time + delta
-
-                start_clip = actual_time - timedelta(seconds=self.time_before.get())
-                if start_clip < datetime.strptime("00:00:00", "%H:%M:%S"):
-                    start_clip = datetime.strptime("00:00:00", "%H:%M:%S")
-                end_clip = actual_time + timedelta(seconds=self.time_after.get())
-
-                if killer in selected_players:
-                    filtered_events.append({
-                        "start": start_clip,
-                        "end": end_clip,
-                        "killer": killer,
-                        "killed": killed
-                    })
-
-
-        if not filtered_events:
-            self.log("No events matched the filtering criteria.")
-            self.process_btn.config(state="normal")
+    def show_progress(self, stage, fraction, eta):
+        # Fed by ffmpeg's -progress output through the renderer, on whichever thread runs the encode
+        text = f"{stage}: {fraction * 100:.0f}%"
+        if eta is not None:
+            text += f" - {int(eta // 60)}:{int(eta % 60):02d} left"
+        self.ui_events.put(("progress", (fraction * 100, text)))
+
+    def create_final_video(self, selected, start_time_str, fp_start_time, settings, output_path="final_output.mp4"):
+        # Runs on a worker thread, like process()
+        try:
+            self.renderer.render_final(
+                selected, start_time_str, fp_start_time, self.intro_path, self.outro_path, settings, output_path
+            )
+        except Exception as e:
+            self.log(f"Error while creating the final video: {e}")
+        finally:
+            self.in_ui(self.final_btn.config, {"state": "normal"})
+            self.in_ui(self.process_btn.config, {"state": "normal"})
+
+    def apply_filters(self):
+        import numpy as np
+        if not self.strip.entries or self.clips_log is None:
             return
+        active_players = [p for p, v in self.filter_vars.items() if v.get()]
 
-        # Sort and merge clips
-        filtered_events.sort(key=lambda c: c["start"])
-        merged_clips = []
-        current = filtered_events[0].copy()
-        current["killers"] = [current.pop("killer")]
-        current["killed_list"] = [current.pop("killed")]
-
-        for clip in filtered_events[1:]:
-            if clip["start"] <= current["end"]:
-                current["end"] = max(current["end"], clip["end"])
-                current["killers"].append(clip["killer"])
-                current["killed_list"].append(clip["killed"])
-            else:
-                merged_clips.append(current)
-                current = clip.copy()
-                current["killers"] = [current.pop("killer")]
-                current["killed_list"] = [current.pop("killed")]
-        merged_clips.append(current)
-
-        self.log(f"Total {len(merged_clips)} clips to generate...")
-        
-        self.clip_times = [(clip["start"], clip["end"]) for clip in merged_clips]
-        
-        for i, clip in enumerate(merged_clips):
-            start = clip["start"]
-            end = clip["end"]
-            killers = ", ".join(clip["killers"])
-            killed = ", ".join(clip["killed_list"])
-
-            clip_filename = f"clips/clip_{i+1}.mp4"
-            start_str = start.strftime("%H:%M:%S")
-            duration = (end - start).total_seconds()
-            if duration <= 0:
-                self.log(f"Skipping clip {i+1} with non-positive duration.")
-                continue
+        # Clips with at least one event involving an active player, straight from the per-player indexes
+        # In live mode the log keeps growing past the last indexed event
+        events = self.clips_log.player_mask(active_players, as_killer=True, as_killed=True)[:len(self.clip_of_event)]
+        visible = np.unique(self.clip_of_event[events & (self.clip_of_event >= 0)])
+        # The strip only re-lays out its index list; widgets exist just for the clips in view
+        hidden = np.setdiff1d([entry["index"] for entry in self.strip.entries], visible)
+        self.strip.set_hidden(hidden.tolist())
 
-            # --- New logic for side-by-side preview ---
-            combine_fp = self.combine_fp_var.get() and self.fp_video_path and self.fp_start_time_entry.get()
-            if combine_fp:
-                try:
-                    fp_first_kill_dt = datetime.strptime(self.fp_start_time_entry.get(), "%H:%M:%S")
-                    stream_start_dt = datetime.strptime(self.start_time_entry.get(), "%H:%M:%S")
-                    # Calculate offset from stream first kill
-                    stream_delta = (start - stream_start_dt).total_seconds()
-                    fp_clip_start = (fp_first_kill_dt + timedelta(seconds=stream_delta)).strftime("%H:%M:%S")
-                    # Convert to seconds for subclip
-                    h, m, s = map(int, start_str.split(":"))
-                    stream_sec = h * 3600 + m * 60 + s
-                    h, m, s = map(int, fp_clip_start.split(":"))
-                    fp_sec = h * 3600 + m * 60 + s
-
-                    # Create side-by-side preview and write to file
-                    side_by_side_clip = self.create_side_by_side_clip(
-                        self.video_path, self.fp_video_path, stream_sec, duration, fp_sec
-                    )
-                    side_by_side_clip.write_videofile(clip_filename, codec="libx264", audio_codec="aac", threads=2, preset="ultrafast", verbose=False, logger=None)
-                    side_by_side_clip.close()
-                except Exception as e:
-                    self.log(f"Failed to create side-by-side preview for clip {i+1}: {e}")
-                    continue
-            else:
-                ffmpeg_cmd = [
-                    "ffmpeg", "-y", "-ss", start_str, "-i", self.video_path,
-                    "-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
-                    "-c:a", "aac", "-b:a", "128k", clip_filename
-                ]
-                self.log(f"Extracting clip {i+1}: {start_str} +{duration:.2f}s {killers} → {killed} ")
-                proc = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if proc.returncode != 0:
-                    self.log(f"Failed to extract clip {i+1}")
-                    self.log(proc.stderr.decode())
-                    continue
+def clip_summary(clip, clip_path=None):
+    return {
+        "start": clip["start"],
+        "end": clip["end"],
+        "killers": clip["killers"],
+        "killed": clip["killed_list"],
+        "path": os.path.abspath(clip_path) if clip_path else None,
+    }
 
-            self.clip_paths.append(clip_filename)
 
-            thumb_path = f"clips/thumb_{i+1}.png"
-            if self.generate_thumbnail(clip_filename, thumb_path):
-                img = Image.open(thumb_path)
-                img.thumbnail((160, 90))
-                img_tk = ImageTk.PhotoImage(img)
-                chk_var = tk.BooleanVar(value=True)
+def run_headless_job(job):
+    """
+    Runs one manifest job end to end (filter, merge, previews, final render) in its own output directory,
+    without Tk. Every clip is kept. Returns a JSON-serializable summary of the job.
+    """
+    name = job.get("name") or Path(job["video"]).stem
+    output_dir = job.get("output_dir") or os.path.join("batch_output", name)
+    os.makedirs(output_dir, exist_ok=True)
+    summary = {"name": name, "output_dir": os.path.abspath(output_dir), "status": "failed", "clips": []}
+    if job.get("match"):
+        summary["session"] = job["session"]
+        summary["match"] = job["match"]
+    started = time.time()
 
-                clip_frame = ttk.Frame(self.scrollable_frame)
-                clip_frame.pack(side="left", padx=5)
+    with open(os.path.join(output_dir, "job.log"), "w", encoding="utf-8") as log_file:
+        def log(message):
+            log_file.write(message + "\n")
+            log_file.flush()
 
-                ttk.Label(clip_frame, text=f"{killers} → {killed}").pack()
-                thumb_label = ttk.Label(clip_frame, image=img_tk)
-                thumb_label.image = img_tk
-                thumb_label.pack()
-                thumb_label.bind("<Button-1>", lambda e, path=clip_filename: self.preview_clip(path))
-                cb = ttk.Checkbutton(clip_frame, variable=chk_var)
-                cb.pack()
+        try:
+            settings = dict(DEFAULT_SETTINGS, **job.get("settings", {}))
+            log(f"Job {name}: {job['video']} + {job['log']}")
+            timer = StageTimer()
+            with timer.stage("log_parse"):
+                kill_log = KillLog.from_file(job["log"])
+                if job.get("events"):
+                    # One match of a session log
+                    kill_log = kill_log.subset(*job["events"])
+            with timer.stage("filtering"):
+                merged_clips = build_clip_list(kill_log, job["first_kill"], settings)
+            if not merged_clips:
+                raise ValueError("No events matched the filtering criteria.")
 
-                self.clip_checks.append((chk_var, clip_filename, clip["killers"], clip["killed_list"], clip_frame))
-            else:
-                self.log(f"Failed to generate thumbnail for clip {i+1}")
+            renderer = ClipRenderer(
+                job["video"], os.path.join(output_dir, "clips"), log,
+                fp_video_path=job.get("fp_video") if job.get("fp_first_kill") else None,
+                cache_budget_gb=settings["cache_budget_gb"], timer=timer, pov_layout=settings["pov_layout"],
+                overlay=kill_feed_style(settings)
+            )
+            merged_clips = renderer.analyze_clips(merged_clips, kill_log, job["first_kill"], settings)
+            results = []
+            renderer.render_previews(
+                merged_clips, job["first_kill"], job.get("fp_first_kill"), settings,
+                lambda result, completed, total: results.append(result)
+            )
+            for result in results:
+                for message in result["messages"]:
+                    log(message)
+            timer.report(log, os.path.join(output_dir, "preview_timings.json"))
+            results = sorted((r for r in results if r["clip_path"]), key=lambda r: r["index"])
+            summary["clips"] = [clip_summary(r["clip"], r["clip_path"]) for r in results]
+            if not results:
+                raise RuntimeError("No clips could be extracted.")
 
-            self.progress['value'] = (i + 1) / len(merged_clips) * 100
-            self.root.update_idletasks()
+            output_path = os.path.join(output_dir, job.get("output_name", "final_output.mp4"))
+            if renderer.render_final(
+                [(r["clip_path"], r["clip"]) for r in results], job["first_kill"], job.get("fp_first_kill"),
+                job.get("intro"), job.get("outro"), settings, output_path
+            ):
+                summary["status"] = "ok"
+                summary["final_video"] = os.path.abspath(output_path)
+        except Exception as e:
+            log(f"Job failed: {e}")
+            summary["error"] = str(e)
 
+    summary["seconds"] = round(time.time() - started, 3)
+    return summary
 
-        if self.clip_paths:
-            self.final_btn.config(state="normal")
+
+def session_jobs(job, log=print):
+    """
+    Splits a job whose log covers a whole session into one job per match (see split_matches), each with
+    its own first kill time and output directory under the job's. POV first kill times move along with
+    the stream's, as POVs of a session are one long recording too.
+    """
+    settings = job["settings"]
+    kill_log = KillLog.from_file(job["log"])
+    matches = split_matches(kill_log, float(settings.get("match_gap_seconds", DEFAULT_SETTINGS["match_gap_seconds"])))
+    overrides = job.get("match_first_kills") or {}
+    if isinstance(overrides, list):
+        overrides = {str(k + 1): value for k, value in enumerate(overrides) if value}
+    anchors = match_anchors(
+        kill_log, matches, job["first_kill"], overrides, job["video"], job.get("first_blood_sample"), log
+    )
+    session_start = parse_hms(job["first_kill"])
+
+    jobs = []
+    for k, ((start, stop), (anchor, source)) in enumerate(zip(matches, anchors)):
+        name = f"match{k + 1:02d}"
+        match_job = dict(
+            job, name=f"{job['name']}-{name}", output_dir=os.path.join(job["output_dir"], name),
+            first_kill=format_timestamp(anchor), events=[start, stop], session=job["name"],
+            match={
+                "number": k + 1, "events": stop - start, "first_kill": format_timestamp(anchor), "anchor": source,
+                "log_start": datetime.fromtimestamp(float(kill_log.times[start])).isoformat(timespec="seconds"),
+                "log_end": datetime.fromtimestamp(float(kill_log.times[stop - 1])).isoformat(timespec="seconds"),
+            }
+        )
+        if job.get("fp_first_kill"):
+            shifted = [format_timestamp(parse_hms(t) + anchor - session_start) for t in pov_list(job["fp_first_kill"])]
+            match_job["fp_first_kill"] = shifted if isinstance(job["fp_first_kill"], list) else shifted[0]
+        jobs.append(match_job)
+    log(f"{job['name']}: {len(jobs)} matches in {len(kill_log)} events.")
+    return jobs
+
+
+def write_session_indexes(summaries):
+    """
+    Writes session_summary.json into each split session's output directory, listing its matches in
+    order with where they are in the recording and the log, their reels and how the run went.
+    """
+    sessions = {}
+    for summary in summaries:
+        if summary.get("session"):
+            sessions.setdefault(summary["session"], []).append(summary)
+    for session, members in sessions.items():
+        members.sort(key=lambda summary: summary["match"]["number"])
+        session_dir = os.path.dirname(members[0]["output_dir"])
+        index = {
+            "session": session,
+            "matches": [
+                dict(
+                    summary["match"], name=summary["name"], status=summary["status"], clips=len(summary["clips"]),
+                    recording_start=format_timestamp(summary["clips"][0]["start"]) if summary["clips"] else None,
+                    recording_end=format_timestamp(summary["clips"][-1]["end"]) if summary["clips"] else None,
+                    final_video=summary.get("final_video"), error=summary.get("error"), seconds=summary["seconds"]
+                )
+                for summary in members
+            ],
+        }
+        with open(os.path.join(session_dir, "session_summary.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+
+
+def load_manifest(manifest_path, processes, split_sessions=False):
+    """
+    Reads a batch manifest: a JSON list of jobs, or {"settings": {...}, "jobs": [...]} with settings
+    shared by every job. Relative paths are resolved against the manifest's directory. Jobs with
+    "split_matches" (or all of them, with split_sessions) become one job per match of their log.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    jobs = []
+    for job in manifest.get("jobs", []):
+        job = dict(job)
+        for key in ("video", "log", "fp_video", "intro", "outro", "output_dir", "first_blood_sample"):
+            if isinstance(job.get(key), list):
+                # Several POVs, with fp_first_kill as a list in the same order
+                job[key] = [os.path.join(base_dir, path) for path in job[key]]
+            elif job.get(key):
+                job[key] = os.path.join(base_dir, job[key])
+        job.setdefault("name", Path(job["video"]).stem)
+        job.setdefault("output_dir", os.path.join(base_dir, "batch_output", job["name"]))
+        # Jobs run side by side, so each one gets a share of the cores unless the manifest says otherwise
+        settings = {"parallel_jobs": max(1, default_parallel_jobs() // processes)}
+        settings.update(manifest.get("settings", {}))
+        settings.update(job.get("settings", {}))
+        job["settings"] = settings
+        if split_sessions or job.get("split_matches"):
+            jobs += session_jobs(job)
         else:
-            self.final_btn.config(state="disabled")
+            jobs.append(job)
+    return jobs
 
-        self.process_btn.config(state="normal")
-        self.log("Clip preview generation complete.")
 
+def run_jobs(jobs, processes, log=print):
+    """
+    Runs headless jobs on a pool of processes and returns their summaries in completion order.
+    """
+    if processes > 1 and any(job.get("settings", {}).get("distributed_port") for job in jobs):
+        # Only one coordinator can listen on the port, and workers only know that one
+        log("Worker agents only help with one job at a time (--processes 1); these jobs render locally.")
+        jobs = [dict(job, settings=dict(job.get("settings", {}), distributed_port=0)) for job in jobs]
+    summaries = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(run_headless_job, job) for job in jobs]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            log(f"[{len(summaries)}/{len(jobs)}] {summary['name']}: {summary['status']} ({summary['seconds']:.1f}s)")
+    write_session_indexes(summaries)
+    return summaries
 
-    def create_final_video(self, selected_clip_paths, output_path="final_output.mp4"):
-        final_clips = []
 
-        # Optional intro
-        if self.intro_path and Path(self.intro_path).exists():
-            final_clips.append(VideoFileClip(self.intro_path))
+def run_batch(manifest_path, summary_path, processes, split_sessions=False):
+    jobs = load_manifest(manifest_path, processes, split_sessions)
+    print(f"Running {len(jobs)} jobs on {processes} processes...")
+    started = time.time()
+    summaries = run_jobs(jobs, processes)
 
-        combine_fp = self.combine_fp_var.get() and self.fp_video_path and self.fp_start_time_entry.get()
-        fp_video_path = self.fp_video_path
-        fp_first_kill_time = self.fp_start_time_entry.get()
+    report = {
+        "manifest": os.path.abspath(manifest_path),
+        "seconds": round(time.time() - started, 3),
+        "succeeded": sum(1 for summary in summaries if summary["status"] == "ok"),
+        "failed": sum(1 for summary in summaries if summary["status"] != "ok"),
+        "jobs": sorted(summaries, key=lambda summary: summary["name"]),
+    }
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Summary written to {summary_path}")
+    return 0 if report["failed"] == 0 else 1
 
-        if combine_fp:
-            # Parse first kill time in FP video
-            try:
-                fp_first_kill_dt = datetime.strptime(fp_first_kill_time, "%H:%M:%S")
-            except Exception:
-                self.log("Invalid first kill time for FP video. Use hh:mm:ss.")
-                self.final_btn.config(state="normal")
-                self.process_btn.config(state="normal")
-                return
 
-            # Find first kill event time in stream
-            if not self.events:
-                self.log("No events loaded for synchronization.")
-                return
-            first_kill_event = next((e for e in self.events), None)
-            if not first_kill_event:
-                self.log("No valid kill events found in log file.")
-                return
-            stream_first_kill_dt = datetime.fromisoformat(first_kill_event["TimeStamp"].replace("Z", "+00:00"))
-            stream_start_time = self.start_time_entry.get()
-            try:
-                stream_start_dt = datetime.strptime(stream_start_time, "%H:%M:%S")
-            except Exception:
-                self.log("Invalid stream start time. Use hh:mm:ss.")
-                return
+# Benchmark cases: a synthetic recording (None for log-only cases) and a synthetic KillFeed log.
+# Everything is seeded, so two runs of the same case on the same machine do identical work.
+BENCHMARK_CASES = [
+    {"name": "360p30-1min", "video": (640, 360, 30, 60), "events": 200, "players": 8, "seed": 1},
+    {"name": "720p30-3min", "video": (1280, 720, 30, 180), "events": 600, "players": 12, "seed": 2},
+    {"name": "1080p60-2min", "video": (1920, 1080, 60, 120), "events": 400, "players": 12, "seed": 3},
+    {"name": "log-200k", "video": None, "events": 200000, "players": 24, "seed": 4},
+]
+BENCHMARK_QUICK_CASES = ("360p30-1min", "log-200k")
 
-            # Calculate offset between stream and FP video
-            # For each clip, calculate the start time in both videos
-            for chk_var, path, killers, killed_list, frame in self.clip_checks:
-                if not chk_var.get():
-                    continue
-                # Extract start time from filename or metadata
-                # We'll need to store start/end times in self.clip_checks or elsewhere
-                # For now, let's assume you have a parallel list self.clip_times = [(start, end), ...]
-                # If not, you should store start/end with each clip in self.clip_checks
-
-                # Let's assume you have self.clip_times = [(start, end), ...] in the same order as self.clip_checks
-                # If not, you need to adjust this logic to get the correct start/end for each clip
-
-                # For demonstration, let's use the clip filename index to get times
-                idx = int(os.path.splitext(os.path.basename(path))[0].split("_")[-1]) - 1
-                start, end = self.clip_times[idx]
-                duration = (end - start).total_seconds()
-                stream_clip_start = start.strftime("%H:%M:%S")
-
-                # Calculate offset from stream first kill
-                stream_delta = (start - stream_start_dt).total_seconds()
-                fp_clip_start = (fp_first_kill_dt + timedelta(seconds=stream_delta)).strftime("%H:%M:%S")
-
-                # Convert to seconds for subclip
-                h, m, s = map(int, stream_clip_start.split(":"))
-                stream_sec = h * 3600 + m * 60 + s
-                h, m, s = map(int, fp_clip_start.split(":"))
-                fp_sec = h * 3600 + m * 60 + s
+# Shape of the synthetic kill logs: mean CameraDistance and how often each view flag is set
+BENCHMARK_LOG_SHAPE = {"distance_mean": 35.0, "in_view_rate": 0.7, "killer_in_view_rate": 0.8}
 
-                try:
-                    side_by_side_clip = self.create_side_by_side_clip(
-                        self.video_path, fp_video_path, stream_sec, duration, fp_sec
-                    )
-                    final_clips.append(side_by_side_clip)
-                except Exception as e:
-                    self.log(f"Failed to create side-by-side clip: {e}")
 
-        else:
-            # Main selected clips (original behavior)
-            for path in selected_clip_paths:
-                if Path(path).exists():
-                    final_clips.append(VideoFileClip(path))
-
-        # Optional outro
-        if self.outro_path and Path(self.outro_path).exists():
-            final_clips.append(VideoFileClip(self.outro_path))
-
-        # Concatenate all
-        if not final_clips:
-            self.log("No valid clips to concatenate.")
-            return
+def generate_test_recording(path, width, height, fps, seconds):
+    """
+    Writes a synthetic recording from ffmpeg's testsrc2 and sine sources, encoded like a typical OBS
+    capture (h264 with a 2 second GOP, aac). Skipped if the file already exists.
+    """
+    if os.path.exists(path):
+        return True
+    cmd = [
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000", "-t", str(seconds),
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(fps * 2), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k", path
+    ]
+    try:
+        ok, stderr = run_ffmpeg(cmd)
+    except OSError:
+        return False  # No ffmpeg
+    return ok
 
-        self.log(f"Generating final video: stitching {len(final_clips)} clips together.")
 
-        final_video = concatenate_videoclips(final_clips, method="compose")
+def generate_test_log(path, events, players, seconds, seed, shape=BENCHMARK_LOG_SHAPE):
+    """
+    Writes a synthetic KillFeed log with the given number of events spread over seconds of recording.
+    The first event is at 5 seconds into the recording.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    names = [f"Player{k:02d}" for k in range(players)]
+    offsets = np.sort(rng.uniform(0, max(seconds - 10, 1), events))
+    offsets -= offsets[0]
+    stamps = np.datetime_as_string(
+        np.datetime64("2024-01-01T20:00:00", "ms") + (offsets * 1000).astype("timedelta64[ms]"), unit="ms"
+    )
+    distances = rng.exponential(shape["distance_mean"], events)
+    in_view = rng.random(events) < shape["in_view_rate"]
+    killer_in_view = rng.random(events) < shape["killer_in_view_rate"]
+    killers = rng.integers(0, players, events)
+    killed = (killers + rng.integers(1, max(players, 2), events)) % players
+    with open(path, "w", encoding="utf-8") as f:
+        for k in range(events):
+            f.write(json.dumps({
+                "TimeStamp": f"{stamps[k]}Z",
+                "Killer": names[killers[k]],
+                "Killed": names[killed[k]],
+                "CameraDistance": round(float(distances[k]), 2),
+                "InView": bool(in_view[k]),
+                "KillerInView": bool(killer_in_view[k]),
+            }) + "\n")
 
-        final_video.write_videofile(
-            output_path,
-            codec="libx264",
-            audio_codec="aac",
-            threads=4,
-            preset="ultrafast",
-        )
 
-        # Cleanup
-        final_video.close()
-        for clip in final_clips:
-            clip.close()
+def peak_rss_mb():
+    """
+    Peak resident memory of this process and of the largest ffmpeg child so far, in MB. None where the
+    resource module is missing (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
 
-        self.final_btn.config(state="normal")
-        self.process_btn.config(state="normal")
-        self.log(f"Edited video generation complete: {output_path}")
-    def apply_filters(self):
-        active_players = {p for p, v in self.filter_vars.items() if v.get()}
 
-        for chk_var, path, killer, killed, frame in self.clip_checks:
-            visible = killer in active_players or killed in active_players
-            if visible:
-                frame.pack(side="left", padx=5)
-            else:
-                frame.pack_forget()
+def run_benchmark_stage(stage, log_path, video_path, fp_path, work_dir, reencode_dir):
+    """
+    Runs one benchmark stage and returns (seconds, amount, unit, peak RSS). Meant to run in a process of
+    its own, so the peak memory is that stage's rather than the highest of the run so far. Only the stage
+    itself is timed; the log parse and merge every stage needs are not.
+    """
+    # Imported up front, as this process is fresh and the first stage would otherwise pay for it
+    import numpy
+    settings = dict(DEFAULT_SETTINGS)
+    started = time.perf_counter()
+    kill_log = KillLog.from_file(log_path)
+    if stage == "log_parse":
+        return time.perf_counter() - started, len(kill_log), "events/s", peak_rss_mb()
+
+    started = time.perf_counter()
+    merged_clips = build_clip_list(kill_log, "00:00:05", settings)
+    if stage == "filter_merge":
+        return time.perf_counter() - started, len(kill_log), "events/s", peak_rss_mb()
+
+    clip_seconds = sum(clip["end"] - clip["start"] for clip in merged_clips)
+    overrides = {}
+    fp_video_path = fp_start_time = None
+    if stage == "previews_proxy":
+        overrides["preview_quality"] = "proxy"
+    elif stage == "side_by_side":
+        fp_video_path, fp_start_time = fp_path, "00:00:05"
+    elif stage.startswith("previews_"):
+        overrides["extraction_mode"] = stage[len("previews_"):]
+    # The final render joins the re-encoded previews, which the previews_reencode stage left in its cache
+    clips_dir = reencode_dir if stage in ("previews_reencode", "final_render") else tempfile.mkdtemp(dir=work_dir)
+    renderer = ClipRenderer(video_path, clips_dir, lambda message: None, fp_video_path=fp_video_path)
+    results = []
+    started = time.perf_counter()
+    renderer.render_previews(
+        merged_clips, "00:00:05", fp_start_time, dict(settings, **overrides),
+        lambda result, completed, total: results.append(result)
+    )
+    if stage != "final_render":
+        return time.perf_counter() - started, clip_seconds, "clip s/s", peak_rss_mb()
+
+    results = sorted((r for r in results if r["clip_path"]), key=lambda r: r["index"])
+    output_path = os.path.join(work_dir, f"{Path(log_path).stem}_final.mp4")
+    started = time.perf_counter()
+    renderer.render_final(
+        [(r["clip_path"], r["clip"]) for r in results], "00:00:05", None, None, None, settings, output_path
+    )
+    return time.perf_counter() - started, clip_seconds, "clip s/s", peak_rss_mb()
+
+
+def run_benchmark_case(case, work_dir, log):
+    """
+    Runs the log parse, filter/merge, preview extraction (every mode), side-by-side and final render paths
+    for one case. Each stage runs in a fresh process and starts from an empty clip cache. Returns a list of
+    result rows.
+    """
+    rows = []
+
+    def record(stage, *paths):
+        # A new single-worker pool per stage, spawned so nothing of this process's memory carries over
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            seconds, amount, unit, rss = pool.submit(run_benchmark_stage, stage, log_path, *paths).result()
+        rows.append({
+            "case": case["name"],
+            "stage": stage,
+            "wall_seconds": round(seconds, 3),
+            "throughput": round(amount / seconds, 2) if seconds > 0 else None,
+            "unit": unit,
+            "peak_rss_mb": rss[0] if rss else None,
+            "peak_child_rss_mb": rss[1] if rss else None,
+        })
+        log(f"  {stage}: {seconds:.2f}s, {rows[-1]['throughput']} {unit}")
+
+    video = case["video"]
+    seconds = video[3] if video else max(case["events"] // 10, 60)
+    log_path = os.path.join(work_dir, f"{case['name']}.log")
+    generate_test_log(log_path, case["events"], case["players"], seconds, case["seed"])
+
+    record("log_parse", None, None, work_dir, None)
+    record("filter_merge", None, None, work_dir, None)
+    settings = dict(DEFAULT_SETTINGS)
+    if not video or not build_clip_list(KillLog.from_file(log_path), "00:00:05", settings):
+        return rows
+    if not all(find_tools().values()):
+        # Recordings kept in --bench-dir from an earlier run exist, but nothing could render them
+        log("  ffmpeg or ffprobe is missing, skipping the render stages")
+        return rows
+
+    width, height, fps, length = video
+    # The first-person video is smaller, like a headset capture next to the caster view
+    fp_width, fp_height = width // 4 * 2, height // 4 * 2
+    video_path = os.path.join(work_dir, f"{width}x{height}p{fps}-{length}s.mp4")
+    fp_path = os.path.join(work_dir, f"{fp_width}x{fp_height}p{fps}-{length}s.mp4")
+    log(f"  generating {os.path.basename(video_path)}...")
+    if not generate_test_recording(video_path, width, height, fps, length) or not generate_test_recording(
+        fp_path, fp_width, fp_height, fps, length
+    ):
+        log("  could not generate the test recordings, skipping the render stages")
+        return rows
+
+    reencode_dir = tempfile.mkdtemp(dir=work_dir)
+    for stage in [f"previews_{mode}" for mode in EXTRACTION_MODES.values()] + ["previews_proxy", "side_by_side", "final_render"]:
+        record(stage, video_path, fp_path, work_dir, reencode_dir)
+    return rows
+
+
+def run_benchmark(results_path, work_dir=None, quick=False):
+    cases = [case for case in BENCHMARK_CASES if not quick or case["name"] in BENCHMARK_QUICK_CASES]
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "pop1-editor-bench")
+    os.makedirs(work_dir, exist_ok=True)
+
+    rows = []
+    started = time.time()
+    for case in cases:
+        print(f"{case['name']}:")
+        rows += run_benchmark_case(case, work_dir, print)
+
+    report = {
+        "started": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "seconds": round(time.time() - started, 3),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "ffmpeg": find_tools()["ffmpeg"],
+        },
+        "settings": DEFAULT_SETTINGS,
+        "results": rows,
+    }
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'case':<14} {'stage':<28} {'wall s':>8} {'throughput':>22} {'stage peak RSS MB':>18}")
+    for row in rows:
+        throughput = f"{row['throughput']} {row['unit']}"
+        print(f"{row['case']:<14} {row['stage']:<28} {row['wall_seconds']:>8} {throughput:>22} {str(row['peak_rss_mb']):>18}")
+    print(f"Results written to {results_path}")
+    return 0
+
+
+def startup_probe():
+    """
+    Brings the window up as a normal start would, then reports which deferred modules got imported
+    and exits. Run in a fresh process by check_startup.
+    """
+    # Without Tk or a display, only the imports are measured
+    shown = False
+    if tk is not None:
+        try:
+            root = tk.Tk()
+            ClipExtractorApp(root)
+            root.update()
+            root.destroy()
+            shown = True
+        except tk.TclError:
+            pass
+    print(json.dumps({"window": shown, "loaded": [name for name in DEFERRED_MODULES if name in sys.modules]}))
+
+
+def check_startup(budget):
+    """
+    Times a fresh start of the app up to its first paint against budget seconds. Fails (returns 1)
+    when it is over budget or a deferred module was imported at startup, and then lists the slowest
+    imports. Meant for CI, so a startup regression doesn't go unnoticed.
+    """
+    # A frozen build is its own interpreter
+    cmd = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, "-X", "importtime", os.path.abspath(__file__)]
+    started = time.perf_counter()
+    proc = subprocess.run(cmd + ["--startup-probe"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    seconds = time.perf_counter() - started
+    try:
+        report = json.loads(proc.stdout.decode(errors="replace").strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        print(proc.stderr.decode(errors="replace"))
+        print("Startup probe failed.")
+        return 1
+
+    # Cumulative times, so a package is charged for everything it pulls in
+    imports = []
+    for line in proc.stderr.decode(errors="replace").splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    imports.sort(reverse=True)
+
+    print(f"Startup: {seconds:.2f} s ({'window shown' if report['window'] else 'no display, imports only'}), budget {budget:.2f} s")
+    failed = seconds > budget or report["loaded"]
+    if report["loaded"]:
+        print(f"Imported at startup but should be deferred: {', '.join(report['loaded'])}")
+    if failed and imports:
+        print("Slowest imports:")
+        for micros, name in imports[:10]:
+            print(f"  {micros / 1000:7.1f} ms  {name}")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Population One Stream Auto Editor")
+    parser.add_argument("--batch", metavar="MANIFEST", help="process the jobs in a JSON manifest without a GUI")
+    parser.add_argument("--summary", default="batch_summary.json", help="where to write the batch summary")
+    parser.add_argument("--processes", type=int, default=1, help="number of jobs to run at once")
+    parser.add_argument("--split-matches", action="store_true", help="render a reel per match of each job's log")
+    parser.add_argument("--benchmark", metavar="RESULTS", help="run the benchmark suite and write its results as JSON")
+    parser.add_argument("--bench-dir", help="where to keep the generated recordings (default: system temp dir)")
+    parser.add_argument("--quick", action="store_true", help="benchmark only the small cases")
+    parser.add_argument("--worker", metavar="URL", help="render jobs for the coordinator at URL (e.g. http://host:8765)")
+    parser.add_argument("--worker-name", help="name this worker reports to the coordinator (default: host-pid)")
+    parser.add_argument("--worker-threads", type=int, help="ffmpeg threads per job (default: every core)")
+    parser.add_argument("--check-startup", nargs="?", type=float, const=STARTUP_BUDGET_SECONDS, metavar="SECONDS",
+                        help=f"time the startup against a budget (default {STARTUP_BUDGET_SECONDS} s) and fail if over")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(run_batch(args.batch, args.summary, max(1, args.processes), args.split_matches))
+    if args.benchmark:
+        sys.exit(run_benchmark(args.benchmark, args.bench_dir, args.quick))
+    if args.check_startup is not None:
+        sys.exit(check_startup(args.check_startup))
+    if args.startup_probe:
+        startup_probe()
+        return
+    if args.worker:
+        try:
+            run_worker(args.worker.rstrip("/"), args.worker_name, args.worker_threads)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if tk is None:
+        print("The GUI needs Tk (the python3-tk package on most Linux distributions); "
+              "--batch, --worker and --benchmark run without it.")
+        sys.exit(1)
     root = tk.Tk()
     ClipExtractorApp(root)
     root.mainloop()
 
-main()
\ No newline at end of file
+
+if __name__ == "__main__":
+    # Needed for the batch process pool in a PyInstaller build
+    multiprocessing.freeze_support()
+    main()
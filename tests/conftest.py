@@ -0,0 +1,15 @@
+import importlib.util
+import os
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamer-auto-editor.py")
+
+
+@pytest.fixture(scope="session")
+def editor():
+    # The script's name isn't importable, so load it from its path
+    spec = importlib.util.spec_from_file_location("streamer_auto_editor", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
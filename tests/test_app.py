@@ -0,0 +1,46 @@
+import types
+
+
+class FakeApp:
+    """
+    Just what the worker-thread entry points of ClipExtractorApp touch, so they run without a display.
+    """
+    def __init__(self):
+        self.messages = []
+        self.ui_calls = []
+        self.clip_paths = []
+        self.intro_path = self.outro_path = None
+        self.process_btn = types.SimpleNamespace(config="process_btn.config")
+        self.final_btn = types.SimpleNamespace(config="final_btn.config")
+
+    def log(self, message):
+        self.messages.append(message)
+
+    def in_ui(self, func, *args):
+        self.ui_calls.append((func, args))
+
+
+def test_failed_preview_run_reenables_the_buttons(editor):
+    app = FakeApp()
+
+    def missing_ffprobe(*args):
+        raise FileNotFoundError("ffprobe")
+    app.render_clip_previews = missing_ffprobe
+    editor.ClipExtractorApp.process(app, dict(editor.DEFAULT_SETTINGS), "00:00:05", None)
+
+    assert ("process_btn.config", ({"state": "normal"},)) in app.ui_calls
+    assert ("final_btn.config", ({"state": "disabled"},)) in app.ui_calls
+    assert any("ffprobe" in message for message in app.messages)
+
+
+def test_failed_final_render_reenables_the_buttons(editor):
+    app = FakeApp()
+
+    def broken(*args):
+        raise RuntimeError("worker crashed")
+    app.renderer = types.SimpleNamespace(render_final=broken)
+    editor.ClipExtractorApp.create_final_video(app, [], "00:00:05", None, dict(editor.DEFAULT_SETTINGS))
+
+    assert ("process_btn.config", ({"state": "normal"},)) in app.ui_calls
+    assert ("final_btn.config", ({"state": "normal"},)) in app.ui_calls
+    assert any("worker crashed" in message for message in app.messages)
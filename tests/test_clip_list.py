@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+def event(second, killer="a", killed="b", distance=10.0, in_view=True, killer_in_view=True):
+    entry = {
+        "TimeStamp": (datetime(2024, 1, 1, 20) + timedelta(seconds=second)).isoformat(timespec="milliseconds") + "Z",
+        "Killer": killer, "Killed": killed, "InView": in_view, "KillerInView": killer_in_view,
+    }
+    if distance is not None:
+        entry["CameraDistance"] = distance
+    return entry
+
+
+def kill_log(editor, events):
+    log = editor.KillLog()
+    log.extend(json.dumps(entry) for entry in events)
+    return log
+
+
+def settings(editor, **overrides):
+    return dict(editor.DEFAULT_SETTINGS, time_before=5, time_after=5, **overrides)
+
+
+def baseline_clips(events, start_time, settings):
+    """
+    The original per-event filter and merge loop, kept as the reference for the vectorized one.
+    """
+    first = datetime.fromisoformat(events[0]["TimeStamp"].replace("Z", "+00:00"))
+    filtered = []
+    for entry in events:
+        visible = not settings["visible_to_caster"] or (entry.get("KillerInView") and entry.get("InView"))
+        if visible and entry.get("CameraDistance", 9999) <= settings["distance_threshold"]:
+            actual = start_time + (datetime.fromisoformat(entry["TimeStamp"].replace("Z", "+00:00")) - first).total_seconds()
+            killer = entry.get("Killer", "Unknown")
+            if settings["players"] is None or killer in settings["players"]:
+                filtered.append({
+                    "start": max(actual - settings["time_before"], 0.0), "end": actual + settings["time_after"],
+                    "killers": [killer], "killed_list": [entry.get("Killed", "Unknown")],
+                })
+    filtered.sort(key=lambda clip: clip["start"])
+    merged = []
+    for clip in filtered:
+        if merged and clip["start"] <= merged[-1]["end"]:
+            merged[-1]["end"] = max(merged[-1]["end"], clip["end"])
+            merged[-1]["killers"] += clip["killers"]
+            merged[-1]["killed_list"] += clip["killed_list"]
+        else:
+            merged.append(clip)
+    return merged
+
+
+def test_matches_the_original_loop(editor):
+    rng = np.random.default_rng(7)
+    names = ["a", "b", "c", "d"]
+    events = [
+        event(
+            float(second), killer=str(rng.choice(names)), killed=str(rng.choice(names)),
+            distance=float(rng.exponential(40)), in_view=bool(rng.random() < 0.8), killer_in_view=bool(rng.random() < 0.8)
+        )
+        for second in np.sort(rng.uniform(0, 600, 300)).round(3)
+    ]
+    log = kill_log(editor, events)
+    for overrides in ({}, {"visible_to_caster": False}, {"players": ["a", "c"]}, {"distance_threshold": 5.0}):
+        options = settings(editor, **overrides)
+        clips = editor.build_clip_list(log, "00:01:00", options)
+        expected = baseline_clips(events, 60.0, options)
+        assert [(c["killers"], c["killed_list"]) for c in clips] == [(c["killers"], c["killed_list"]) for c in expected]
+        assert np.allclose([(c["start"], c["end"]) for c in clips], [(c["start"], c["end"]) for c in expected])
+
+
+def test_touching_intervals_merge(editor):
+    log = kill_log(editor, [event(0), event(10), event(20.5)])
+    clips = editor.build_clip_list(log, "00:01:00", settings(editor))
+
+    # 0 and 10 touch (55-65, 65-75), 20.5 starts half a second after
+    assert [(c["start"], c["end"]) for c in clips] == [(55.0, 75.0), (75.5, 85.5)]
+    assert clips[0]["event_ids"] == [0, 1]
+
+
+def test_start_is_clamped_at_zero(editor):
+    clips = editor.build_clip_list(kill_log(editor, [event(0)]), "00:00:02", settings(editor))
+
+    assert (clips[0]["start"], clips[0]["end"]) == (0.0, 7.0)
+
+
+def test_only_the_killer_counts_for_the_player_filter(editor):
+    log = kill_log(editor, [event(0, killer="a", killed="b"), event(30, killer="b", killed="a")])
+    clips = editor.build_clip_list(log, "00:01:00", settings(editor, players=["b"]))
+
+    assert [c["killers"] for c in clips] == [["b"]]
+    assert log.select(settings(editor, players=["nobody"])).tolist() == [False, False]
+
+
+def test_missing_camera_distance_is_far_away(editor):
+    log = kill_log(editor, [event(0, distance=None), event(30)])
+
+    assert log.distance[0] == 9999
+    assert log.select(settings(editor, distance_threshold=50.0)).tolist() == [False, True]
+    assert log.select(settings(editor, distance_threshold=10000.0)).tolist() == [True, True]
+
+
+def test_times_are_anchored_on_the_first_event(editor):
+    # The first event is filtered out but still marks the entered first kill time
+    log = kill_log(editor, [event(0, distance=500.0), event(40)])
+    clips = editor.build_clip_list(log, "00:01:00", settings(editor))
+
+    assert (clips[0]["start"], clips[0]["end"]) == (95.0, 105.0)
+    assert clips[0]["kill_times"] == [100.0]
+
+
+def test_merge_intervals_keeps_a_stable_order(editor):
+    order, group = editor.merge_intervals(np.array([10.0, 0.0, 10.0, 30.0]), np.array([12.0, 10.0, 11.0, 31.0]))
+
+    assert order.tolist() == [1, 0, 2, 3]
+    assert group.tolist() == [0, 0, 0, 1]
+
+
+def test_split_matches_at_long_gaps(editor):
+    log = kill_log(editor, [event(t) for t in (0, 30, 100, 400, 420, 800)])
+
+    assert editor.split_matches(log, 180) == [(0, 3), (3, 5), (5, 6)]
+    assert editor.split_matches(log, 1000) == [(0, 6)]
+    assert editor.split_matches(editor.KillLog(), 180) == []
+
+
+def test_score_and_trim_follows_the_loud_part(editor):
+    rate = editor.SYNC_ENVELOPE_RATE
+    levels = np.full(60 * rate, 1.0)
+    levels[18 * rate:24 * rate] = 5.0  # A fight from 18 to 24 s
+    clips = [
+        {"start": 10.0, "end": 30.0, "killers": ["a"], "killed_list": ["b"]},
+        {"start": 40.0, "end": 50.0, "killers": ["a"], "killed_list": ["b"]},
+    ]
+    scored = editor.score_and_trim_clips(clips, [(20.0, 22.0), (45.0, 45.0)], levels)
+
+    loud, quiet = scored
+    assert 17.5 <= loud["start"] <= 18.5 and 23.5 <= loud["end"] <= 24.5
+    # Nothing active around the quiet kill, so only the minimum padding is left
+    assert (quiet["start"], quiet["end"]) == (45.0 - editor.ENERGY_MIN_PADDING, 45.0 + editor.ENERGY_MIN_PADDING)
+    assert loud["score"] > quiet["score"] == 0.0
+    untrimmed = editor.score_and_trim_clips(clips, [(20.0, 22.0), (45.0, 45.0)], levels, trim=False)
+    assert [(c["start"], c["end"]) for c in untrimmed] == [(10.0, 30.0), (40.0, 50.0)]
+
+
+def test_locate_template_finds_the_excerpt(editor):
+    rng = np.random.default_rng(3)
+    signal = rng.random(5000)
+    position, score = editor.locate_template(signal, signal[1234:1734].copy())
+
+    assert abs(position - 1234) < 0.5
+    assert score > 0.99
+    assert editor.locate_template(signal, np.ones(100)) == (None, 0.0)
+    assert editor.locate_template(signal[:50], signal[:100]) == (None, 0.0)
@@ -0,0 +1,43 @@
+import socket
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_failing_job_reaches_render_previews(editor, tmp_path, monkeypatch):
+    def explode(spec, worker, threads):
+        raise RuntimeError("encoder crashed")
+    monkeypatch.setattr(editor, "execute_render_job", explode)
+
+    video = tmp_path / "stream.mp4"
+    video.write_bytes(b"")
+    renderer = editor.ClipRenderer(str(video), str(tmp_path / "clips"), log=lambda message: None)
+    # Nothing gets encoded, so planning needs no ffprobe either
+    monkeypatch.setattr(renderer, "probe_source", lambda path: None)
+    clip = {"start": 0.0, "end": 2.0, "killers": ["a"], "killed_list": ["b"], "event_ids": [0], "kill_times": [1.0]}
+    settings = dict(editor.DEFAULT_SETTINGS, parallel_jobs=1, distributed_port=free_port())
+
+    results = []
+    renderer.render_previews([clip], "00:00:00", None, settings, lambda result, completed, total: results.append(result))
+
+    assert len(results) == 1
+    result = results[0]
+    assert result["index"] == 0
+    assert result["clip_path"] is None
+    assert result["thumb_path"] is None
+    assert any("encoder crashed" in message for message in result["messages"])
+
+
+def test_late_success_after_lease_expired(editor):
+    coordinator = editor.RenderCoordinator([{"n": 0}], log=lambda message: None, lease_seconds=0)
+    coordinator.lease("slow")
+    with coordinator.lock:
+        coordinator.expire_leases()
+    coordinator.result("slow", 0, True, {"clip_path": "clip.mp4"})
+
+    assert coordinator.remaining == 0
+    assert coordinator.results.get_nowait()[1]["clip_path"] == "clip.mp4"
+    assert coordinator.lease("other") == {"done": True}
@@ -0,0 +1,43 @@
+import json
+
+
+def event(second, killer="a", killed="b"):
+    return json.dumps({
+        "TimeStamp": f"2024-01-01T20:00:{second:02d}.000Z", "Killer": killer, "Killed": killed,
+        "CameraDistance": 1.0, "InView": True, "KillerInView": True,
+    })
+
+
+def make_session(editor, tmp_path, lines):
+    video = tmp_path / "stream.mkv"
+    video.write_bytes(b"")
+    log_path = tmp_path / "KillFeed.log"
+    log_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    renderer = editor.ClipRenderer(str(video), str(tmp_path / "clips"), log=lambda message: None)
+    messages, results = [], []
+    session = editor.LiveSession(
+        renderer, str(log_path), "00:00:05", None, dict(editor.DEFAULT_SETTINGS, parallel_jobs=1),
+        lambda result, completed, total: results.append(result), log=messages.append
+    )
+    return session, messages, results
+
+
+def test_garbled_lines_are_skipped(editor, tmp_path):
+    session, messages, results = make_session(editor, tmp_path, [event(0), '{"TimeStamp": "2024-01', "[]", event(3)])
+
+    assert session.poll_log() == 2
+    assert session.kill_log.players == ["a", "b"]
+
+
+def test_failing_clip_does_not_end_the_session(editor, tmp_path, monkeypatch):
+    session, messages, results = make_session(editor, tmp_path, [event(0)])
+
+    def explode(*args):
+        raise OSError("ffmpeg not found")
+    monkeypatch.setattr(session.renderer, "render_preview", explode)
+    session.stop()
+    session.run()
+
+    assert results == []
+    assert any("ffmpeg not found" in message for message in messages)
+    assert messages[-1] == "Live mode stopped after 1 clips."
@@ -0,0 +1,24 @@
+def make_renderer(editor, tmp_path):
+    video = tmp_path / "stream.mp4"
+    video.write_bytes(b"")
+    return editor.ClipRenderer(str(video), str(tmp_path / "clips"), log=lambda message: None)
+
+
+def test_final_render_follows_the_preview_quality(editor, tmp_path, monkeypatch):
+    renderer = make_renderer(editor, tmp_path)
+    renderer.remember_previews("00:00:05", None, "smartcut", "proxy")
+    calls = []
+
+    def segments(selected, stream_start_time, fp_start_time, settings, checkpoint):
+        calls.append((stream_start_time, settings["extraction_mode"]))
+        return []
+    monkeypatch.setattr(renderer, "render_source_segments", segments)
+
+    clip = {"start": 0.0, "end": 2.0, "killers": ["a"], "killed_list": ["b"], "event_ids": [0]}
+    # The box was switched to full quality after the proxies were made
+    settings = dict(editor.DEFAULT_SETTINGS, preview_quality="full", extraction_mode="reencode")
+    renderer.render_final(
+        [(str(tmp_path / "proxy.mp4"), clip)], "00:00:09", None, None, None, settings, str(tmp_path / "final.mp4")
+    )
+
+    assert calls == [("00:00:05", "smartcut")]